@@ -1,32 +1,96 @@
 """Lambda function."""
 
-from .draft import Player, Scheme
-from .draft.algorithm.genetic import Genetic
+import json
+import logging
+import math
+import time
+from typing import Any, Dict, List, Optional, Union
 
+from .draft import LineUp, Player, Scheme, parallel
+from .draft.cache import PoolCache
+from .draft.drafter import Drafter
+from .draft.ensemble import draft_ensemble
+from .draft.records import Records, to_players
 
-def handler(event, context):  # pylint: disable=unused-argument
+# Seconds kept free of drafting to build the response before the lambda times out.
+TIME_MARGIN = 1.0
+# Players of all the pools kept across warm invocations.
+POOL_CACHE_SIZE = 50000
+
+
+def time_limit(context) -> Optional[float]:
+    """Seconds left for drafting in this invocation."""
+    if not hasattr(context, "get_remaining_time_in_millis"):
+        return None
+    return max(context.get_remaining_time_in_millis() / 1000 - TIME_MARGIN, 0)
+
+
+POOLS = PoolCache(POOL_CACHE_SIZE)
+
+
+def to_response(
+    records: Records,
+    line_up: Union[LineUp, List[LineUp]],
+    include_bench: bool,
+    telemetry: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Get the records of the players and bench of a line up, or of many."""
+    if isinstance(line_up, list):
+        response: Dict[str, Any] = {
+            "line_ups": [to_response(records, each, include_bench) for each in line_up]
+        }
+    else:
+        bench = [player.id for player in line_up.bench] if include_bench else []
+        response = {
+            "players": records.get([player.id for player in line_up.players]),
+            "bench": records.get(bench),
+        }
+
+    if telemetry is not None:
+        response["telemetry"] = telemetry
+    return response
+
+
+def handler(event, context):
     """Lambda handler."""
-    scheme = Scheme(**event["scheme"])
-    price = float(event["price"])
-    max_players_per_club = int(event["max_players_per_club"])
-    include_bench = bool(event["bench"])
-    players = [
-        Player(
-            id=player["id"],
-            position=player["position"],
-            price=player["price"],
-            points=player["points"],
-            club=player["club"],
-        )
-        for player in event["players"]
-    ]
+    start = time.perf_counter()
+    records = Records(event["players"])
+    if event.get("cache", True):
+        drafter = POOLS.get(records)
+        logging.info("Pool cache: %s", json.dumps(POOLS.stats()))
+    else:
+        drafter = Drafter(to_players(records))
+    seconds = {"decode": time.perf_counter() - start}
 
-    algo = Genetic(players, n_generations=409, n_individuals=470)
-    line_up = algo.draft(price, scheme, max_players_per_club)
+    drafter.time_limit = time_limit(context)
+    frequencies: List[Any] = []
+    if "drafts" in event:
+        common = {k: v for k, v in event.items() if k not in ("players", "drafts")}
+        requests = [{**common, **request} for request in event["drafts"]]
+
+        # Each worker drafts its share of the requests one after another.
+        n_workers = parallel.n_workers(len(requests), event.get("max_workers"))
+        if drafter.time_limit is not None and requests:
+            drafter.time_limit /= math.ceil(len(requests) / n_workers)
+        results = parallel.map_workers(drafter, requests, max_workers=n_workers)
+    else:
+        requests = [event]
+        if "ensemble" in event:
+            result, frequencies = draft_ensemble(drafter, event)
+            results = [result]
+        else:
+            results = [drafter(event)]
+    seconds["solve"] = time.perf_counter() - start - seconds["decode"]
+
+    responses = [
+        to_response(records, line_up, bool(request["bench"]), telemetry)
+        for (line_up, telemetry), request in zip(results, requests)
+    ]
+    seconds["encode"] = time.perf_counter() - start - sum(seconds.values())
+    logging.info(json.dumps({"seconds": seconds}))
 
-    players = [player.id for player in line_up.players]
-    bench = [player.id for player in line_up.bench]
-    return {
-        "players": [p for p in event["players"] if p["id"] in players],
-        "bench": [p for p in event["players"] if p["id"] in bench and include_bench],
-    }
+    if "drafts" in event:
+        return {"drafts": responses}
+    if "ensemble" in event:
+        responses[0]["frequencies"] = frequencies
+    return responses[0]
@@ -1,13 +1,15 @@
 """Cartola FC line-up draft."""
 
 from dataclasses import dataclass
-from typing import Dict, Generator, Iterator, List
+from typing import Dict, FrozenSet, Generator, Iterator, List, Set
 
 
-@dataclass
+@dataclass(eq=False)
 class Player:
     """Player"""
 
+    __slots__ = ("id", "position", "price", "points", "club")
+
     id: int  # pylint: disable=invalid-name
     position: str
     price: float
@@ -17,11 +19,16 @@ class Player:
     def __eq__(self, other):
         return self.id == other.id
 
+    def __hash__(self):
+        return hash(self.id)
+
 
 @dataclass
 class Scheme:
     """Line-up scheme."""
 
+    __slots__ = ("goalkeeper", "defender", "fullback", "midfielder", "forward", "coach")
+
     goalkeeper: int
     defender: int
     fullback: int
@@ -51,7 +58,25 @@ class Scheme:
 
 @dataclass
 class LineUp:
-    """Squad line-up"""
+    """Squad line-up.
+
+    Points, price and counts per position and per club are kept up to date on every
+    change, so players must be changed through `add_player` and `remove_player`.
+    Players are kept sorted by position.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    __slots__ = (
+        "scheme",
+        "players",
+        "bench",
+        "_points",
+        "_price",
+        "_ids",
+        "_count_per_position",
+        "_count_per_club",
+    )
 
     scheme: Scheme
     players: List[Player]
@@ -61,64 +86,108 @@ class LineUp:
         self.players = sorted(self.players, key=lambda x: x.position)
         self.bench = sorted(self.bench, key=lambda x: x.position)
 
+        self._points = 0.0
+        self._price = 0.0
+        self._ids: Set[int] = set()
+        self._count_per_position = {pos: 0 for pos in self.scheme.keys()}
+        self._count_per_club: Dict[int, int] = {}
+        for player in self.players:
+            self._track(player, 1)
+
     def __iter__(self) -> Generator:
         for player in self.players:
             yield player
 
+    def __contains__(self, player: Player) -> bool:
+        return player.id in self._ids
+
+    @property
+    def ids(self) -> FrozenSet[int]:
+        """Get line-up players ids, regardless of their order."""
+        return frozenset(self._ids)
+
+    def _track(self, player: Player, sign: int):
+        """Update running totals with an added (+1) or removed (-1) player."""
+        self._points += sign * player.points
+        self._price += sign * player.price
+        if sign > 0:
+            self._ids.add(player.id)
+        else:
+            self._ids.discard(player.id)
+        self._count_per_position[player.position] = (
+            self._count_per_position.get(player.position, 0) + sign
+        )
+        count = self._count_per_club.get(player.club, 0) + sign
+        if count:
+            self._count_per_club[player.club] = count
+        else:
+            del self._count_per_club[player.club]
+
     @property
     def points(self):
         """Get line-up points."""
-        return sum(player.points for player in self.players)
+        return self._points
 
     @property
     def price(self):
         """Get line-up price."""
-        return sum(player.price for player in self.players)
+        return self._price
 
     @property
     def players_per_position(self) -> Dict[str, List[Player]]:
         """Get line-up players by position."""
-        return {
-            pos: [player for player in self.players if player.position == pos]
-            for pos in self.scheme.keys()
-        }
+        players: Dict[str, List[Player]] = {pos: [] for pos in self.scheme.keys()}
+        for player in self.players:
+            players.setdefault(player.position, []).append(player)
+        return players
 
     @property
     def missing(self) -> Dict[str, int]:
         """Check if line-up still missing players from a certain position."""
         return {
-            key: val - len(self.players_per_position[key])
-            for key, val in self.scheme.items()
+            key: val - self._count_per_position[key] for key, val in self.scheme.items()
         }
 
     @property
     def players_per_club(self):
         """Get players per club."""
-        count = {}
-        for player in self.players:
-            if player.club not in count:
-                count[player.club] = 1
-            else:
-                count[player.club] += 1
-        return count
+        return dict(self._count_per_club)
 
     @property
     def max_players_per_club(self):
         """Get max players per club."""
-        return max(self.players_per_club.values())
+        return max(self._count_per_club.values())
 
     def add_player(self, player: Player):
         """Add player to the line-up."""
-        self.players.append(player)
+        index = len(self.players)
+        while index and self.players[index - 1].position > player.position:
+            index -= 1
+        self.players.insert(index, player)
+        self._track(player, 1)
 
     def remove_player(self, player: Player):
         """Remove player from the line-up."""
         self.players.remove(player)
+        self._track(player, -1)
 
     def is_valid(self) -> bool:
         """Check if line up is valid."""
-        return all(count == 0 for count in self.missing.values())
+        return all(
+            self._count_per_position[key] == val for key, val in self.scheme.items()
+        )
 
     def copy(self) -> "LineUp":
         """Copy this instance."""
-        return LineUp(scheme=self.scheme, players=self.players, bench=self.bench)
+        # pylint: disable=protected-access
+        # Skip __post_init__ because players are already sorted and counted.
+        line_up = LineUp.__new__(LineUp)
+        line_up.scheme = self.scheme
+        line_up.players = self.players.copy()
+        line_up.bench = self.bench.copy()
+        line_up._points = self._points
+        line_up._price = self._price
+        line_up._ids = self._ids.copy()
+        line_up._count_per_position = self._count_per_position.copy()
+        line_up._count_per_club = self._count_per_club.copy()
+        return line_up
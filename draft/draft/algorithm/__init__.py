@@ -1,7 +1,27 @@
 """Cartola FC optimization algorithms."""
 
 import abc
-from typing import Dict, Sequence, List
+import bisect
+import heapq
+import importlib
+import importlib.util
+import inspect
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Optional,
+    Sequence,
+    List,
+    Set,
+    Tuple,
+    Type,
+)
 
 from .. import Player, Scheme, LineUp
 
@@ -16,43 +36,410 @@ def players_per_position(players: Sequence[Player]) -> Dict[str, List[Player]]:
     }
 
 
+def prune_dominated(
+    players: Sequence[Player],
+    scheme: Scheme,
+    max_players_per_club: int,
+    n_reserves: int = 1,
+) -> List[Player]:
+    """Remove players that can not be in the best line up or on its bench.
+
+    A player is dominated by the players of the same position that are no more
+    expensive and score more points. If there are more dominating players than the
+    scheme needs, one of them is always a better choice, unless the club constraint
+    forbids it. So the dominating players of the largest clubs that could be full in
+    the line up are not counted. Positions out of the scheme are removed as well.
+    """
+    # pylint: disable=too-many-locals
+    n_players = sum(count for _, count in scheme.items())
+    # Clubs, other than the player one, that could be full in the line up.
+    n_full_clubs = (n_players - 1) // max(max_players_per_club, 1)
+
+    kept = []
+    for pos, count in scheme.items():
+        if count <= 0:
+            continue
+
+        needed = count + n_reserves
+        # Cheaper players first and, at the same price, the ones with more points.
+        ordered = sorted(
+            (p for p in players if p.position == pos),
+            key=lambda p: (p.price, -p.points),
+        )
+        by_points: List[Player] = []  # Players seen so far, with the most points first.
+        keys: List[float] = []
+        for player in ordered:
+            clubs: Dict[Any, int] = {}
+            n_dominating = 0
+            dominated = False
+            for other in by_points:
+                if other.points <= player.points:
+                    break
+                n_dominating += 1
+                if other.club != player.club:
+                    clubs[other.club] = clubs.get(other.club, 0) + 1
+                if n_dominating >= needed:
+                    full = sorted(clubs.values(), reverse=True)[:n_full_clubs]
+                    if n_dominating - sum(full) >= needed:
+                        dominated = True
+                        break
+
+            if not dominated:
+                kept.append(player)
+            index = bisect.bisect_right(keys, -player.points)
+            keys.insert(index, -player.points)
+            by_points.insert(index, player)
+
+    return kept
+
+
+def distance(line_up1: LineUp, line_up2: LineUp) -> int:
+    """Number of players of a line up that are not in another one."""
+    return sum(player not in line_up2 for player in line_up1)
+
+
 class DraftError(Exception):
     """Error on drafting players."""
 
 
-class BaseAlgorithm(abc.ABC):
-    """Algorithm base class."""
+class RangeMax:
+    """Index of the maximum value in any range of a sequence.
+
+    Built as a sparse table in O(n log n), answering each range in O(1).
+    """
 
     # pylint: disable=too-few-public-methods
 
+    def __init__(self, values: Sequence[float]):
+        self.values = values
+        self._table = [list(range(len(values)))]
+        width = 1
+        while 2 * width <= len(values):
+            last = self._table[-1]
+            self._table.append(
+                [
+                    self._best(last[i], last[i + width])
+                    for i in range(len(values) - 2 * width + 1)
+                ]
+            )
+            width *= 2
+
+    def _best(self, i: int, j: int) -> int:
+        """Index of the greatest of two values, preferring the first on ties."""
+        return j if self.values[j] > self.values[i] else i
+
+    def __call__(self, start: int, stop: int) -> int:
+        """Index of the maximum value in values[start:stop]."""
+        level = (stop - start).bit_length() - 1
+        row = self._table[level]
+        return self._best(row[start], row[stop - (1 << level)])
+
+
+class BaseAlgorithm(abc.ABC):
+    """Algorithm base class.
+
+    Line ups are drafted with `bench_size` players on the bench for each position.
+    Algorithms with random choices draw them from their own generator, so drafts
+    with the same `seed` are reproducible. Algorithms that evolve generations call
+    each of the `callbacks` with the statistics of every generation.
+    """
+
+    # pylint: disable=too-few-public-methods,too-many-instance-attributes
+
     @abc.abstractmethod
-    def __init__(self, players: List[Player]):
+    def __init__(
+        self,
+        players: List[Player],
+        time_limit: Optional[float] = None,
+        seed: Optional[int] = None,
+    ):
         """Initializer"""
         self.players = players
         self.players_per_position = players_per_position(self.players)
+        self.time_limit = time_limit
+        self.seed = seed
+        self.callbacks: List[Callable[[Dict[str, Any]], None]] = []
+
+        # Players of each position from the cheapest and from the best.
+        self.players_by_price = {
+            pos: sorted(players, key=lambda p: p.price)
+            for pos, players in self.players_per_position.items()
+        }
+        self.prices = {
+            pos: [p.price for p in players]
+            for pos, players in self.players_by_price.items()
+        }
+        self.players_by_points = {
+            pos: sorted(players, key=lambda p: p.points, reverse=True)
+            for pos, players in self.players_per_position.items()
+        }
+
+        # Best player in any price range, to draft the bench.
+        self.bench_size = 1
+        self._best_by_price = {
+            pos: RangeMax([p.points for p in players])
+            for pos, players in self.players_by_price.items()
+        }
+
+    @classmethod
+    def parameters(cls) -> Set[str]:
+        """Names of the parameters of the initializer, other than the players."""
+        return {
+            name
+            for name, param in inspect.signature(cls.__init__).parameters.items()
+            if name not in ("self", "players")
+            and param.kind not in (param.VAR_POSITIONAL, param.VAR_KEYWORD)
+        }
+
+    def _deadline(self) -> float:
+        """Moment, as in `time.perf_counter`, to return the best line-up so far."""
+        if self.time_limit is None:
+            return math.inf
+        return time.perf_counter() + self.time_limit
 
     def _draft_bench(self, line_up: LineUp) -> List[Player]:
-        """Draft players for the bench of a given line up."""
+        """Draft players for the bench of a given line up.
+
+        The bench of each position has the players with the most points that are not
+        more expensive than the cheapest starter of the position.
+        """
         bench = []
-        for pos, count in line_up.scheme.items():
+        for pos, players in line_up.players_per_position.items():
 
-            if "coach" in pos:
+            if "coach" in pos or not players:
                 continue
 
-            if count > 0:
-                price = min(p.price for p in players_per_position(line_up.players)[pos])
-                players = [
-                    p
-                    for p in self.players_per_position[pos]
-                    if p.price <= price and p not in line_up.players
-                ]
-                if len(players) == 0:
-                    continue
-                player = sorted(players, key=lambda p: p.points)[-1]
-                bench.append(player)
+            price = min(p.price for p in players)
+            stop = bisect.bisect_right(self.prices[pos], price)
+            if stop == 0:
+                continue
+
+            # Split price ranges around their best player until the bench is full.
+            best = self._best_by_price[pos]
+            ranges = [(-best.values[best(0, stop)], 0, stop)]
+            n_drafted = 0
+            while ranges and n_drafted < self.bench_size:
+                _, start, stop = heapq.heappop(ranges)
+                index = best(start, stop)
+                player = self.players_by_price[pos][index]
+                if player not in line_up:
+                    bench.append(player)
+                    n_drafted += 1
+                for start, stop in ((start, index), (index + 1, stop)):
+                    if start < stop:
+                        heapq.heappush(
+                            ranges, (-best.values[best(start, stop)], start, stop)
+                        )
 
         return bench
 
+    def _distinct(
+        self,
+        line_ups: Iterable[LineUp],
+        price: float,
+        max_players_per_club: int,
+        n_line_ups: int,
+        min_distance: int,
+    ) -> List[LineUp]:
+        """First line ups within the constraints that differ by `min_distance` players.
+
+        Each line up is compared with the ones chosen before it. Benches are drafted
+        for the chosen line ups only.
+        """
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        chosen: List[LineUp] = []
+        for line_up in line_ups:
+            if len(chosen) == n_line_ups:
+                break
+            if (
+                line_up.price > price
+                or line_up.max_players_per_club > max_players_per_club
+            ):
+                continue
+            if all(distance(line_up, other) >= min_distance for other in chosen):
+                chosen.append(line_up)
+
+        for line_up in chosen:
+            line_up.bench = self._draft_bench(line_up)
+        return chosen
+
+    def _warm_start(self, ids: Sequence[Any], scheme: Scheme) -> LineUp:
+        """Line up with the players of a previous one that are still available.
+
+        Players that are not in the pool, or that exceed the count of their position
+        in the scheme, are left out, so the line up may be incomplete.
+        """
+        players = {player.id: player for player in self.players}
+        line_up = LineUp(scheme=scheme, players=[], bench=[])
+        for id_ in dict.fromkeys(ids):
+            player = players.get(id_)
+            if player is not None and line_up.missing.get(player.position, 0) > 0:
+                line_up.add_player(player)
+        return line_up
+
     @abc.abstractmethod
-    def draft(self, price: float, scheme: Scheme, max_players_per_club: int) -> LineUp:
-        """Draft players following an specified scheme."""
+    def draft(
+        self,
+        price: float,
+        scheme: Scheme,
+        max_players_per_club: int,
+        warm_start: Optional[Sequence[Any]] = None,
+    ) -> LineUp:
+        """Draft players following an specified scheme.
+
+        A warm start is a list of ids of the players of a previous line up, which the
+        search starts from.
+        """
+
+    def draft_many(
+        self,
+        price: float,
+        scheme: Scheme,
+        max_players_per_club: int,
+        n_line_ups: int,
+        min_distance: int = 1,
+        warm_start: Optional[Sequence[Any]] = None,
+    ) -> List[LineUp]:
+        """Draft distinct line ups, differing by at least `min_distance` players.
+
+        Each line up is drafted by a new run, and runs that repeat a line up are not
+        retried, so there may be fewer line ups than asked.
+        """
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        line_ups: List[LineUp] = []
+        for _ in range(n_line_ups):
+            line_up = self.draft(price, scheme, max_players_per_club, warm_start)
+            if all(distance(line_up, other) >= min_distance for other in line_ups):
+                line_ups.append(line_up)
+        return line_ups
+
+
+@dataclass
+class AlgorithmSpec:
+    """Registered algorithm.
+
+    The class is only imported when it is used, so optional dependencies of one
+    algorithm do not slow down or break the others.
+    """
+
+    path: str  # "module.Class", relative to this package for built-in algorithms.
+    params: Dict[str, Any] = field(default_factory=dict)
+    quality: float = 1.0  # Expected fraction of the optimal points.
+    cost: Callable[[int, int, float, Dict[str, Any]], float] = lambda *_: 0.0
+    requires: Tuple[str, ...] = ()  # Modules that must be installed.
+    auto: bool = True  # Whether "auto" may choose it.
+
+    def load(self) -> Type[BaseAlgorithm]:
+        """Import the algorithm class."""
+        module, name = self.path.rsplit(".", 1)
+        return getattr(importlib.import_module(module, __name__), name)
+
+    def is_available(self) -> bool:
+        """Check if the required modules are installed."""
+        return all(importlib.util.find_spec(module) for module in self.requires)
+
+
+def _genetic_cost(seconds_per_evaluation: float) -> Callable[..., float]:
+    """Expected seconds of a genetic algorithm, given the cost of scoring a slot."""
+
+    def cost(n_players, n_slots, price, params):  # pylint: disable=unused-argument
+        n_evaluations = params["n_generations"] * params["n_individuals"] * n_slots
+        return seconds_per_evaluation * n_evaluations
+
+    return cost
+
+
+def _exact_cost(n_players, n_slots, price, params):
+    """Expected seconds of the exact algorithm, dominated by its bound table."""
+    units = price / params.get("resolution", 0.1)
+    return 4e-7 * n_players * n_slots / len(POSITIONS) * units
+
+
+# Costs were fitted to single-core timings on the 198-player sample and on synthetic
+# pools of up to 3000 players.
+ALGORITHMS: Dict[str, AlgorithmSpec] = {
+    "genetic": AlgorithmSpec(
+        path=".genetic.Genetic",
+        params={"n_generations": 409, "n_individuals": 470},
+        quality=0.99,
+        cost=_genetic_cost(2e-6),
+    ),
+    "vectorized": AlgorithmSpec(
+        path=".vectorized.VectorizedGenetic",
+        params={"n_generations": 409, "n_individuals": 470},
+        quality=0.99,
+        cost=_genetic_cost(2e-7),
+        requires=("numpy",),
+    ),
+    "island": AlgorithmSpec(
+        path=".island.Island",
+        params={"n_generations": 409, "n_individuals": 470},
+        quality=0.99,
+        # Its speed-up over the cores of a Lambda has not been measured, so there is
+        # no cost to compare it with the other algorithms.
+        auto=False,
+    ),
+    "exact": AlgorithmSpec(
+        path=".exact.Exact",
+        quality=1.0,
+        cost=_exact_cost,
+    ),
+}
+
+
+def register(name: str, spec: AlgorithmSpec):
+    """Register an algorithm so that it can be chosen by name."""
+    ALGORITHMS[name] = spec
+
+
+def select_algorithm(
+    n_players: int,
+    scheme: Scheme,
+    price: float,
+    quality: float = 0.99,
+    params: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Name of the fastest available algorithm expected to reach the quality.
+
+    Costs are estimated with the default parameters of each algorithm, overridden by
+    the given ones.
+    """
+    n_slots = sum(count for _, count in scheme.items())
+    candidates = [
+        (spec.cost(n_players, n_slots, price, {**spec.params, **(params or {})}), name)
+        for name, spec in ALGORITHMS.items()
+        if spec.auto and spec.quality >= quality and spec.is_available()
+    ]
+    if not candidates:
+        raise DraftError(f"There is no algorithm expected to reach {quality=}.")
+    return min(candidates)[1]
+
+
+def create_algorithm(name: str, players: List[Player], **params: Any) -> BaseAlgorithm:
+    """Create a registered algorithm, overriding its default parameters.
+
+    Parameters of other available algorithms are left out, so the same parameters
+    can be given whichever algorithm is chosen. Parameters of none are an error.
+    """
+    if name not in ALGORITHMS:
+        raise DraftError(f"Unknown algorithm '{name}'.")
+    spec = ALGORITHMS[name]
+    if not spec.is_available():
+        raise DraftError(f"Algorithm '{name}' requires {', '.join(spec.requires)}.")
+    cls = spec.load()
+    accepted = cls.parameters()
+    ignored = set(params) - accepted
+    if ignored:
+        known = set().union(
+            *(
+                other.load().parameters()
+                for other in ALGORITHMS.values()
+                if other.is_available()
+            )
+        )
+        unknown = ignored - known
+        if unknown:
+            raise DraftError(f"Unknown parameters: {', '.join(sorted(unknown))}.")
+        logging.info("Ignoring parameters of other algorithms: %s.", sorted(ignored))
+    params = {k: v for k, v in params.items() if k in accepted}
+    return cls(players, **{**spec.params, **params})
@@ -0,0 +1,218 @@
+"""Exact branch-and-bound algorithm."""
+
+import math
+import time
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from . import BaseAlgorithm, DraftError
+from .. import Player, Scheme, LineUp
+
+# Tolerance on float comparisons of prices and points.
+EPSILON = 1e-9
+# Number of search nodes between checks of the time limit.
+CHECK_EVERY = 1000
+# Most cells of the bound table, which has one for each player, slot and budget unit.
+MAX_CELLS = 5_000_000
+
+
+class Exact(BaseAlgorithm):
+    """Branch-and-bound algorithm that always finds the optimal line-up.
+
+    Players of each position are tried in decreasing order of points. Branches are
+    pruned with a dynamic programming bound: the best points that the remaining slots
+    could reach with the remaining budget if the club constraint is ignored. Prices
+    are rounded down to `resolution` on the bound, which keeps it optimistic. The
+    resolution is coarsened on large pools, so that the bound table fits in
+    `MAX_CELLS`.
+
+    When the time limit is reached the best line-up found so far is returned, which
+    is not guaranteed to be optimal.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(
+        self,
+        players: List[Player],
+        resolution: float = 0.1,
+        time_limit: Optional[float] = None,
+        seed: Optional[int] = None,
+    ):
+        # The search is deterministic, so the seed changes nothing.
+        super().__init__(players, time_limit=time_limit, seed=seed)
+        self.resolution = resolution
+        self.n_nodes = 0
+
+    @staticmethod
+    def _units(price: float, resolution: float) -> int:
+        """Convert a price into budget units, rounding down."""
+        return math.floor(price / resolution + EPSILON)
+
+    def _bounds(
+        self,
+        candidates: List[List[Player]],
+        counts: List[int],
+        budget: int,
+        resolution: float,
+        deadline: float,
+    ) -> List[List[List[List[float]]]]:
+        """Best points for each search state as a function of the remaining budget.
+
+        Item [k][i][r][b] is the best points reachable choosing r players from
+        candidates[k][i:] and filling all positions after k with b budget units.
+        Raises DraftError if the time limit is reached while building them.
+        """
+        # pylint: disable=too-many-locals
+        size = budget + 1
+        impossible = [-math.inf] * size
+        after = [0.0] * size
+        bounds: List[List[List[List[float]]]] = [[] for _ in candidates]
+
+        for k in reversed(range(len(candidates))):
+            count = counts[k]
+            table = [[after] + [impossible] * count]
+            for player in reversed(candidates[k]):
+                if time.perf_counter() >= deadline:
+                    raise DraftError("Reached the time limit before searching.")
+                cost = self._units(player.price, resolution)
+                following = table[-1]
+                rows = [after]
+                for r in range(1, count + 1):
+                    skip, take = following[r], following[r - 1]
+                    rows.append(
+                        skip[:cost]
+                        + [max(s, player.points + t) for s, t in zip(skip[cost:], take)]
+                    )
+                table.append(rows)
+            table.reverse()
+            bounds[k] = table
+            after = table[0][count]
+
+        return bounds
+
+    def draft(
+        self,
+        price: float,
+        scheme: Scheme,
+        max_players_per_club: int,
+        warm_start: Optional[Sequence[Any]] = None,
+    ) -> LineUp:
+        """Draft players following an specified scheme.
+
+        A warm start that is still a complete and valid line up is the first
+        incumbent, so branches that can not beat it are pruned from the start.
+        """
+        return self.draft_many(
+            price, scheme, max_players_per_club, n_line_ups=1, warm_start=warm_start
+        )[0]
+
+    def draft_many(
+        self,
+        price: float,
+        scheme: Scheme,
+        max_players_per_club: int,
+        n_line_ups: int,
+        min_distance: int = 1,
+        warm_start: Optional[Sequence[Any]] = None,
+    ) -> List[LineUp]:
+        """Draft the best line ups, each differing from the previous ones.
+
+        Each search finds the best line up with at least `min_distance` players that
+        are not in each line up found before, reusing the bound table. Searches stop
+        when there are no more such line ups or the time limit is reached, so there
+        may be fewer line ups than asked.
+        """
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        # pylint: disable=too-many-locals,too-many-statements
+        deadline = self._deadline()
+        positions = [pos for pos, count in scheme.items() if count > 0]
+        counts = [scheme.to_dict()[pos] for pos in positions]
+        candidates = [self.players_by_points[pos] for pos in positions]
+        if any(len(c) < n for c, n in zip(candidates, counts)):
+            raise DraftError("There are not enough players to form a line-up.")
+
+        # The bound does not need budgets above the price of the most expensive team.
+        most_expensive = sum(
+            sum(sorted(p.price for p in c)[-n:]) for c, n in zip(candidates, counts)
+        )
+        top = min(price, most_expensive)
+        rows = sum(len(c) * (n + 1) for c, n in zip(candidates, counts))
+        resolution = max(self.resolution, top * rows / MAX_CELLS)
+        budget = max(self._units(top, resolution), 0)
+        bounds = self._bounds(candidates, counts, budget, resolution, deadline)
+
+        best_points = -math.inf
+        best_players: List[Player] = []
+        if warm_start:
+            previous = self._warm_start(warm_start, scheme)
+            if (
+                previous.is_valid()
+                and previous.price <= price + EPSILON
+                and previous.max_players_per_club <= max_players_per_club
+            ):
+                best_points, best_players = previous.points, previous.players.copy()
+        chosen: List[Player] = []
+        clubs: Dict[int, int] = {}
+        found: List[Set[Any]] = []  # Ids of the players of each line up found.
+        self.n_nodes = 0
+        timed_out = False
+
+        def search(k: int, i: int, r: int, spent: float, points: float):
+            nonlocal best_points, best_players, timed_out
+            self.n_nodes += 1
+            if self.n_nodes % CHECK_EVERY == 0 and time.perf_counter() >= deadline:
+                timed_out = True
+            if timed_out:
+                return
+
+            if r == 0:
+                if k == len(positions) - 1:
+                    ids = {player.id for player in chosen}
+                    if all(len(ids - other) >= min_distance for other in found):
+                        best_points, best_players = points, chosen.copy()
+                    return
+                k, i, r = k + 1, 0, counts[k + 1]
+
+            remaining = price - spent
+            units = min(self._units(remaining, resolution), budget)
+            players = candidates[k]
+            for j in range(i, len(players) - r + 1):
+                # Bounds only decrease with j, so no later candidate can do better.
+                if points + bounds[k][j][r][units] <= best_points + EPSILON:
+                    break
+
+                player = players[j]
+                if player.price > remaining + EPSILON:
+                    continue
+                if clubs.get(player.club, 0) >= max_players_per_club:
+                    continue
+
+                chosen.append(player)
+                clubs[player.club] = clubs.get(player.club, 0) + 1
+                search(k, j + 1, r - 1, spent + player.price, points + player.points)
+                clubs[player.club] -= 1
+                chosen.pop()
+                if timed_out:
+                    return
+
+        line_ups: List[LineUp] = []
+        while len(line_ups) < n_line_ups:
+            if positions and price >= 0:
+                search(0, 0, counts[0], 0.0, 0.0)
+
+            if not best_players:
+                if line_ups:
+                    break
+                if timed_out:
+                    raise DraftError("Reached the time limit before finding a line-up.")
+                raise DraftError("There is no line-up that satisfies the constraints.")
+
+            line_ups.append(LineUp(scheme=scheme, players=best_players, bench=[]))
+            found.append({player.id for player in best_players})
+            best_points, best_players = -math.inf, []
+            if timed_out:
+                break
+
+        for line_up in line_ups:
+            line_up.bench = self._draft_bench(line_up)
+        return line_ups
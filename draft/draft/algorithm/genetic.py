@@ -1,16 +1,30 @@
 """Genetic algorithm."""
 
-from typing import List, Sequence
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Sequence, Tuple
+import bisect
+import itertools
+import math
 import random
+import time
 
 from . import BaseAlgorithm, DraftError
 from .. import Player, Scheme, LineUp
 
 
 class Genetic(BaseAlgorithm):
-    """Genetic algorithm."""
+    """Genetic algorithm.
 
-    # pylint: disable=too-few-public-methods
+    Random choices come from the `random` attribute, a generator of its own, and
+    the ones of each generation are drawn before its offsprings are created.
+
+    Statistics of each generation given to the callbacks are its number, the best
+    points and fitness, the fraction of line ups within the constraints, the
+    fraction of distinct line ups, the fitness cache hits and misses, and the
+    seconds spent to create, crossover, mutate, repair and rank the line ups.
+    """
+
+    # pylint: disable=too-few-public-methods,too-many-instance-attributes
 
     def __init__(
         self,
@@ -21,33 +35,84 @@ class Genetic(BaseAlgorithm):
         crossover_proba: float = 0.5,
         mutation_proba: float = 0.5,
         max_n_mutations: int = 3,
+        time_limit: Optional[float] = None,
+        patience: Optional[int] = None,
+        cache_size: int = 0,
+        repair: bool = False,
+        seed: Optional[int] = None,
     ):
         # pylint: disable=too-many-arguments
-        super().__init__(players)
+        super().__init__(players, time_limit=time_limit, seed=seed)
+        self.random = random.Random(seed)
+        self._seconds: Dict[str, float] = {}
         self.n_generations = n_generations
         self.n_individuals = n_individuals
         self.n_elite = n_elite
         self.crossover_proba = crossover_proba
         self.mutation_proba = mutation_proba
         self.n_mutations = max_n_mutations
+        self.patience = patience
         self.history: List[float] = []
 
-    @staticmethod
-    def _create(players: List[Player], scheme: Scheme) -> LineUp:
-        """Create a random line up."""
-        line_up = LineUp(scheme=scheme, players=[], bench=[])
-        random.shuffle(players)
-        for player in players:
+        # Elite line ups and their unchanged copies are ranked again every generation,
+        # but the fitness is as cheap as looking it up, so the cache is off by default.
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache: "OrderedDict[Tuple[FrozenSet[int], float, int], float]" = (
+            OrderedDict()
+        )
+        self.repair = repair
 
-            if line_up.missing[player.position]:
+    def _create(self, scheme: Scheme, line_up: Optional[LineUp] = None) -> LineUp:
+        """Create a random line up, or complete a given one with random players."""
+        line_up = (
+            LineUp(scheme=scheme, players=[], bench=[])
+            if line_up is None
+            else line_up.copy()
+        )
+        if line_up.is_valid():
+            return line_up
+        # Shuffle a copy, since the players list may be shared with other algorithms.
+        for player in self.random.sample(self.players, len(self.players)):
+
+            if line_up.missing[player.position] and player not in line_up:
                 line_up.add_player(player)
 
             if line_up.is_valid():
-                line_up.players.sort(key=lambda x: x.position)
                 return line_up
 
         raise DraftError("There are not enough players to form a line-up.")
 
+    def _population(
+        self, scheme: Scheme, warm_start: Optional[Sequence[Any]] = None
+    ) -> List[LineUp]:
+        """Create the first generation.
+
+        With a warm start, half of the generation is the previous line up, completed
+        with random players, and its neighbors, changed by a few mutations each.
+        """
+        start = time.perf_counter()
+        if not warm_start:
+            line_ups = [self._create(scheme) for _ in range(self.n_individuals)]
+        else:
+            previous = self._create(scheme, self._warm_start(warm_start, scheme))
+            line_ups = [previous]
+            while len(line_ups) < max(self.n_individuals // 2, 1):
+                neighbor = previous.copy()
+                for _ in range(self.random.randint(1, max(self.n_mutations, 1))):
+                    self._mutate(neighbor)
+                line_ups.append(neighbor)
+            while len(line_ups) < self.n_individuals:
+                line_ups.append(self._create(scheme))
+
+        self._seconds = {
+            "create": time.perf_counter() - start,
+            "crossover": 0.0,
+            "mutate": 0.0,
+        }
+        return line_ups
+
     @staticmethod
     def _fitness(line_up: LineUp, max_price: float, max_players_per_club: int) -> float:
         """Calculate fitness metric. The greater the better"""
@@ -57,29 +122,47 @@ class Genetic(BaseAlgorithm):
             return max_players_per_club - line_up.max_players_per_club
         return line_up.points
 
+    def _cached_fitness(
+        self, line_up: LineUp, max_price: float, max_players_per_club: int
+    ) -> float:
+        """Calculate fitness metric, remembering the most recent line ups."""
+        key = (line_up.ids, max_price, max_players_per_club)
+        if key in self._cache:
+            self.cache_hits += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        self.cache_misses += 1
+        fitness = self._fitness(line_up, max_price, max_players_per_club)
+        if self.cache_size > 0:
+            self._cache[key] = fitness
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return fitness
+
     def _rank(
         self,
         line_ups: Sequence[LineUp],
         max_price: float,
         max_players_per_club: int,
-    ) -> Sequence[LineUp]:
+    ) -> List[LineUp]:
         """Rank line ups based on the fitness."""
+        fitness = self._cached_fitness if self.cache_size > 0 else self._fitness
         return sorted(
             line_ups,
-            key=lambda line_up: self._fitness(
-                line_up=line_up,
-                max_price=max_price,
-                max_players_per_club=max_players_per_club,
-            ),
+            key=lambda line_up: fitness(line_up, max_price, max_players_per_club),
             reverse=True,
         )
 
-    @staticmethod
-    def _crossover(line_up1: LineUp, line_up2: LineUp):
+    def _crossover(self, line_up1: LineUp, line_up2: LineUp):
         """Crossover two teams."""
-        for player1, player2 in zip(line_up1.players, line_up2.players):
-            if random.random() > 0.5:
-                if player1 not in line_up2.players and player2 not in line_up1.players:
+        # Players are sorted by position, so the same index holds the same position.
+        # Each bit tells if a pair of players is swapped.
+        swaps = self.random.getrandbits(len(line_up1.players))
+        players = zip(line_up1.players.copy(), line_up2.players.copy())
+        for i, (player1, player2) in enumerate(players):
+            if swaps >> i & 1:
+                if player1 not in line_up2 and player2 not in line_up1:
                     line_up1.remove_player(player1)
                     line_up2.add_player(player1)
                     line_up2.remove_player(player2)
@@ -87,9 +170,9 @@ class Genetic(BaseAlgorithm):
 
     def _mutate(self, line_up: LineUp):
         """Change a random player from the line up."""
-        to_remove = random.choice(line_up.players)
+        to_remove = self.random.choice(line_up.players)
         players_available = self.players_per_position[to_remove.position]
-        new_player = random.choice(players_available)
+        new_player = self.random.choice(players_available)
 
         if new_player in line_up:
             self._mutate(line_up)
@@ -97,49 +180,245 @@ class Genetic(BaseAlgorithm):
             line_up.remove_player(to_remove)
             line_up.add_player(new_player)
 
+    def _candidates(
+        self,
+        line_up: LineUp,
+        player: Player,
+        max_price: float,
+        max_players_per_club: int,
+        same_club: bool = True,
+    ) -> Iterator[Player]:
+        """Players that could replace another one, from the cheapest to the priciest.
+
+        Candidates are not in the line up, cost up to a price and do not pass the max
+        players per club.
+        """
+        # pylint: disable=too-many-arguments
+        position = player.position
+        end = bisect.bisect_right(self.prices[position], max_price)
+        clubs = line_up.players_per_club
+        for candidate in self.players_by_price[position][:end]:
+            if candidate in line_up:
+                continue
+            if candidate.club == player.club:
+                if same_club:
+                    yield candidate
+            elif clubs.get(candidate.club, 0) < max_players_per_club:
+                yield candidate
+
+    def _repair(self, line_up: LineUp, max_price: float, max_players_per_club: int):
+        """Swap players in place until the line up is within the price and club cap.
+
+        Each swap takes the best player that fixes the problem, or the cheapest one.
+        Line ups that cannot be repaired are left as they are.
+        """
+        for _ in range(2 * len(line_up.players)):
+            if self._fitness(line_up, max_price, max_players_per_club) >= 0:
+                return
+
+            clubs = line_up.players_per_club
+            crowded = [
+                p for p in line_up.players if clubs[p.club] > max_players_per_club
+            ]
+            swap = None
+
+            if crowded:
+                # The worst player of a crowded club goes to another club.
+                player = min(crowded, key=lambda p: p.points)
+                budget = player.price + max(max_price - line_up.price, 0)
+                candidates = list(
+                    self._candidates(
+                        line_up, player, math.inf, max_players_per_club, same_club=False
+                    )
+                )
+                fixing = [p for p in candidates if p.price <= budget]
+                if fixing:
+                    swap = (player, max(fixing, key=lambda p: p.points))
+                elif candidates:
+                    swap = (player, candidates[0])
+
+            else:
+                # A cheaper player goes in, starting from the priciest players.
+                excess = line_up.price - max_price
+                for player in sorted(line_up.players, key=lambda p: -p.price):
+                    candidates = [
+                        p
+                        for p in self._candidates(
+                            line_up, player, player.price, max_players_per_club
+                        )
+                        if p.price < player.price
+                    ]
+                    fixing = [p for p in candidates if p.price <= player.price - excess]
+                    if fixing:
+                        swap = (player, max(fixing, key=lambda p: p.points))
+                        break
+                    if candidates and swap is None:
+                        swap = (player, candidates[0])
+
+            if swap is None:
+                return
+            line_up.remove_player(swap[0])
+            line_up.add_player(swap[1])
+
     def _offsprings(self, line_ups: Sequence[LineUp]):
         """Create offsprings."""
         line_ups = line_ups[: self.n_elite]
+        n_pairs = (self.n_individuals + 1) // 2
 
-        offsprings: List[LineUp] = []
-        while len(offsprings) < self.n_individuals:
-            line_up1 = random.choice(line_ups).copy()
-            line_up2 = random.choice(line_ups).copy()
+        # Draw the parents and which of them cross over and mutate at once.
+        start = time.perf_counter()
+        parents = self.random.choices(line_ups, k=2 * n_pairs)
+        draw = self.random.random
+        crossovers = [draw() > self.crossover_proba for _ in range(n_pairs)]
+        mutations = [draw() > self.mutation_proba for _ in range(n_pairs)]
+        offsprings = [line_up.copy() for line_up in parents]
+        created = time.perf_counter()
 
-            if random.random() > self.crossover_proba:
-                self._crossover(line_up1, line_up2)
+        for i in range(n_pairs):
+            if crossovers[i]:
+                self._crossover(offsprings[2 * i], offsprings[2 * i + 1])
+        crossed = time.perf_counter()
 
-            if random.random() > self.mutation_proba:
+        for i in range(n_pairs):
+            if mutations[i]:
                 for _ in range(self.n_mutations):
-                    self._mutate(line_up1)
-                    self._mutate(line_up2)
-
-            offsprings.append(line_up1)
-            offsprings.append(line_up2)
+                    self._mutate(offsprings[2 * i])
+                    self._mutate(offsprings[2 * i + 1])
+        mutated = time.perf_counter()
 
+        self._seconds = {
+            "create": created - start,
+            "crossover": crossed - created,
+            "mutate": mutated - crossed,
+        }
         return offsprings[: self.n_individuals]
 
-    def draft(self, price: float, scheme: Scheme, max_players_per_club: int) -> LineUp:
-        """Draft players following an specified scheme."""
-        line_ups = [
-            self._create(self.players, scheme) for _ in range(self.n_individuals)
+    def _report(
+        self,
+        generation: int,
+        ranked_line_ups: List[LineUp],
+        max_price: float,
+        max_players_per_club: int,
+        cache: Tuple[int, int],
+    ):
+        """Call the callbacks with the statistics of a ranked generation."""
+        # pylint: disable=too-many-arguments
+        fitness = [
+            self._fitness(line_up, max_price, max_players_per_club)
+            for line_up in ranked_line_ups
         ]
+        stats = {
+            "generation": generation,
+            "points": ranked_line_ups[0].points,
+            "fitness": fitness[0],
+            "feasible": sum(f >= 0 for f in fitness) / len(fitness),
+            "diversity": len({line_up.ids for line_up in ranked_line_ups})
+            / len(ranked_line_ups),
+            "cache_hits": self.cache_hits - cache[0],
+            "cache_misses": self.cache_misses - cache[1],
+            "seconds": dict(self._seconds),
+        }
+        for callback in self.callbacks:
+            callback(stats)
+
+    def _generations(
+        self, line_ups: List[LineUp], price: float, max_players_per_club: int
+    ) -> Iterator[List[LineUp]]:
+        """Evolve line ups, yielding them ranked at every generation.
 
-        for gen in range(self.n_generations):
+        The ranked list may be changed in place before the next generation is asked.
+        """
+        for generation in itertools.count():
+            start = time.perf_counter()
+            if self.repair:
+                for line_up in line_ups:
+                    self._repair(line_up, price, max_players_per_club)
+            repaired = time.perf_counter()
 
+            cache = (self.cache_hits, self.cache_misses)
             ranked_line_ups = self._rank(
                 line_ups,
                 max_price=price,
                 max_players_per_club=max_players_per_club,
             )
+            self._seconds["repair"] = repaired - start
+            self._seconds["rank"] = time.perf_counter() - repaired
+
             self.history.append(ranked_line_ups[0].points)
+            if self.callbacks:
+                self._report(
+                    generation, ranked_line_ups, price, max_players_per_club, cache
+                )
+            yield ranked_line_ups
 
             best = ranked_line_ups[0]
-            if gen == self.n_generations - 1:
-                best.bench = self._draft_bench(best)
-                return best
-
             line_ups = self._offsprings(ranked_line_ups)
             line_ups[0] = best
 
+    def _evolve(
+        self,
+        price: float,
+        scheme: Scheme,
+        max_players_per_club: int,
+        warm_start: Optional[Sequence[Any]] = None,
+    ) -> List[LineUp]:
+        """Evolve a population, returning the last generation ranked."""
+        deadline = self._deadline()
+        self._cache.clear()
+        self.history = []
+        line_ups = self._population(scheme, warm_start)
+        generations = self._generations(line_ups, price, max_players_per_club)
+
+        best_fitness = -math.inf
+        n_stalled = 0
+
+        for gen, ranked_line_ups in zip(range(self.n_generations), generations):
+
+            fitness = self._fitness(ranked_line_ups[0], price, max_players_per_club)
+            n_stalled = n_stalled + 1 if fitness <= best_fitness else 0
+            best_fitness = max(fitness, best_fitness)
+
+            if (
+                gen == self.n_generations - 1
+                or n_stalled == self.patience
+                or time.perf_counter() >= deadline
+            ):
+                return ranked_line_ups
+
         raise DraftError("Reached end of iterations without exiting.")
+
+    def draft(
+        self,
+        price: float,
+        scheme: Scheme,
+        max_players_per_club: int,
+        warm_start: Optional[Sequence[Any]] = None,
+    ) -> LineUp:
+        """Draft players following an specified scheme.
+
+        A warm start is a list of ids of the players of a previous line up. Half of
+        the first generation is built around the ones still available.
+        """
+        best = self._evolve(price, scheme, max_players_per_club, warm_start)[0]
+        best.bench = self._draft_bench(best)
+        return best
+
+    def draft_many(
+        self,
+        price: float,
+        scheme: Scheme,
+        max_players_per_club: int,
+        n_line_ups: int,
+        min_distance: int = 1,
+        warm_start: Optional[Sequence[Any]] = None,
+    ) -> List[LineUp]:
+        """Draft the best distinct line ups from the last generation of a single run.
+
+        Only line ups within the price and max players per club are returned, so there
+        may be fewer than asked.
+        """
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        line_ups = self._evolve(price, scheme, max_players_per_club, warm_start)
+        return self._distinct(
+            line_ups, price, max_players_per_club, n_line_ups, min_distance
+        )
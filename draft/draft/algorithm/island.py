@@ -0,0 +1,306 @@
+"""Island model genetic algorithm."""
+
+import math
+import random
+import time
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from . import BaseAlgorithm, DraftError
+from .genetic import Genetic
+from .. import Player, Scheme, LineUp
+from .. import parallel
+
+
+class Islands:
+    """Group of populations that evolve in the same process."""
+
+    # pylint: disable=too-few-public-methods,too-many-arguments,too-many-positional-arguments
+
+    def __init__(
+        self,
+        players: List[Player],
+        seeds: List[Optional[int]],
+        params: Dict[str, Any],
+        scheme: Scheme,
+        price: float,
+        max_players_per_club: int,
+        warm_start: Optional[Sequence[Any]] = None,
+        report: bool = False,
+    ):
+        # pylint: disable=protected-access
+        self.price = price
+        self.max_players_per_club = max_players_per_club
+        self.algos = [Genetic(players, seed=seed, **params) for seed in seeds]
+        # Statistics of the generations of each island since the last evolve.
+        self.stats: List[List[Dict[str, Any]]] = [[] for _ in seeds]
+        if report:
+            for algo, stats in zip(self.algos, self.stats):
+                algo.callbacks = [stats.append]
+        self.generations = [
+            algo._generations(
+                algo._population(scheme, warm_start), price, max_players_per_club
+            )
+            for algo in self.algos
+        ]
+        self.ranked: List[Optional[List[LineUp]]] = [None] * len(seeds)
+
+    def _fitness(self, line_up: LineUp) -> float:
+        """Fitness of a line up."""
+        return Genetic._fitness(  # pylint: disable=protected-access
+            line_up, self.price, self.max_players_per_club
+        )
+
+    def evolve(
+        self, immigrants: List[List[LineUp]], n_generations: int, n_migrants: int
+    ) -> List[Tuple[float, List[float], List[Dict[str, Any]], List[LineUp]]]:
+        """Receive immigrants and evolve each island for some generations.
+
+        Returns, for each island, the fitness of its best line up, the history of the
+        generations, their statistics if reported and the line ups that will migrate.
+        """
+        results = []
+        for i, algo in enumerate(self.algos):
+            ranked = self.ranked[i]
+            if ranked is not None and immigrants[i]:
+                ranked[-len(immigrants[i]) :] = immigrants[i]
+                ranked.sort(key=self._fitness, reverse=True)
+
+            for _ in range(n_generations):
+                ranked = next(self.generations[i])
+            self.ranked[i] = ranked
+
+            results.append(
+                (
+                    self._fitness(ranked[0]),
+                    algo.history[-n_generations:],
+                    self.stats[i].copy(),
+                    [line_up.copy() for line_up in ranked[:n_migrants]],
+                )
+            )
+            self.stats[i].clear()
+        return results
+
+    def best(self, n_line_ups: int) -> List[LineUp]:
+        """Best line ups of each island, which are ranked from the best."""
+        return [
+            line_up.copy()
+            for ranked in self.ranked
+            if ranked is not None
+            for line_up in ranked[:n_line_ups]
+        ]
+
+
+class Island(BaseAlgorithm):
+    """Genetic algorithm with several populations that exchange their best line ups.
+
+    Islands are spread over worker processes, or evolve in this process when only
+    one core is available. The population is split between the islands, and every
+    `migration_interval` generations each island sends its `n_migrants` best line ups
+    to the next one, replacing its worst line ups. Each island has its own random
+    generator, seeded from the generator of this algorithm. The callbacks get the
+    statistics of each generation merged over the islands.
+    """
+
+    # pylint: disable=too-few-public-methods,too-many-instance-attributes
+
+    def __init__(
+        self,
+        players: List[Player],
+        n_generations: int = 200,
+        n_individuals: int = 500,
+        n_islands: int = 4,
+        migration_interval: int = 20,
+        n_migrants: int = 2,
+        max_workers: Optional[int] = None,
+        time_limit: Optional[float] = None,
+        patience: Optional[int] = None,
+        seed: Optional[int] = None,
+        **params: Any,
+    ):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        super().__init__(players, time_limit=time_limit, seed=seed)
+        self.random = random.Random(seed)
+        self.n_generations = n_generations
+        self.n_individuals = n_individuals
+        self.n_islands = n_islands
+        self.migration_interval = migration_interval
+        self.n_migrants = n_migrants
+        self.max_workers = max_workers
+        self.patience = patience
+        self.params = params
+        self.history: List[float] = []
+
+    @classmethod
+    def parameters(cls) -> Set[str]:
+        """Names of the parameters, including the ones passed to each island."""
+        return super().parameters() | Genetic.parameters()
+
+    def _start(
+        self,
+        scheme: Scheme,
+        price: float,
+        max_players_per_club: int,
+        warm_start: Optional[Sequence[Any]],
+    ) -> Tuple[List[Any], List[int]]:
+        """Start the groups of islands, returning them and their sizes."""
+        n_groups = parallel.n_workers(self.n_islands, self.max_workers)
+        sizes = [len(range(i, self.n_islands, n_groups)) for i in range(n_groups)]
+        params = {
+            "n_individuals": max(self.n_individuals // self.n_islands, 2),
+            **self.params,
+        }
+        seeds = [self.random.getrandbits(64) for _ in range(self.n_islands)]
+        starts = [sum(sizes[:i]) for i in range(n_groups)]
+        groups = parallel.start(
+            Islands,
+            [
+                (
+                    self.players,
+                    seeds[start : start + size],
+                    params,
+                    scheme,
+                    price,
+                    max_players_per_club,
+                    warm_start,
+                    bool(self.callbacks),
+                )
+                for start, size in zip(starts, sizes)
+            ],
+            parallel=n_groups > 1,
+        )
+        return groups, sizes
+
+    def _evolve(
+        self,
+        price: float,
+        scheme: Scheme,
+        max_players_per_club: int,
+        warm_start: Optional[Sequence[Any]],
+        n_line_ups: int,
+    ) -> List[LineUp]:
+        """Evolve the islands, returning the best line ups of each one, ranked."""
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        # pylint: disable=too-many-locals
+        deadline = self._deadline()
+        self.history = []
+        groups, sizes = self._start(scheme, price, max_players_per_club, warm_start)
+
+        best_fitness = -math.inf
+        n_stalled = 0
+        immigrants: List[List[LineUp]] = [[] for _ in range(self.n_islands)]
+
+        try:
+            gen = 0
+            while gen < self.n_generations:
+                n_generations = min(self.migration_interval, self.n_generations - gen)
+                gen += n_generations
+
+                start = 0
+                for group, size in zip(groups, sizes):
+                    group.send(
+                        "evolve",
+                        immigrants[start : start + size],
+                        n_generations,
+                        self.n_migrants,
+                    )
+                    start += size
+                results = [result for group in groups for result in group.recv()]
+
+                # Each island sends its best line ups to the next one.
+                immigrants = [results[i - 1][3] for i in range(self.n_islands)]
+                self.history += [max(h) for h in zip(*(r[1] for r in results))]
+                for stats in zip(*(r[2] for r in results)):
+                    merged = self._merge(stats)
+                    for callback in self.callbacks:
+                        callback(merged)
+
+                fitness = max(result[0] for result in results)
+                if fitness > best_fitness:
+                    best_fitness, n_stalled = fitness, 0
+                else:
+                    n_stalled += n_generations
+
+                if (
+                    self.patience is not None and n_stalled >= self.patience
+                ) or time.perf_counter() >= deadline:
+                    break
+
+            for group in groups:
+                group.send("best", n_line_ups)
+            line_ups = [line_up for group in groups for line_up in group.recv()]
+        finally:
+            for group in groups:
+                group.close()
+
+        if not line_ups:
+            raise DraftError("Reached end of iterations without exiting.")
+
+        return sorted(
+            line_ups,
+            key=lambda line_up: self._fitness(line_up, price, max_players_per_club),
+            reverse=True,
+        )
+
+    @staticmethod
+    def _merge(stats: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+        """Statistics of a generation of all the islands.
+
+        Points and fitness are the best of the islands, as in the history. Feasible
+        and diversity are averaged over the islands, and the cache use and seconds
+        are summed.
+        """
+        seconds: Dict[str, float] = {}
+        for each in stats:
+            for phase, value in each["seconds"].items():
+                seconds[phase] = seconds.get(phase, 0.0) + value
+        return {
+            "generation": stats[0]["generation"],
+            "points": max(each["points"] for each in stats),
+            "fitness": max(each["fitness"] for each in stats),
+            "feasible": sum(each["feasible"] for each in stats) / len(stats),
+            "diversity": sum(each["diversity"] for each in stats) / len(stats),
+            "cache_hits": sum(each["cache_hits"] for each in stats),
+            "cache_misses": sum(each["cache_misses"] for each in stats),
+            "seconds": seconds,
+        }
+
+    @staticmethod
+    def _fitness(line_up: LineUp, price: float, max_players_per_club: int) -> float:
+        """Fitness of a line up, as the islands rank them."""
+        return Genetic._fitness(  # pylint: disable=protected-access
+            line_up, price, max_players_per_club
+        )
+
+    def draft(
+        self,
+        price: float,
+        scheme: Scheme,
+        max_players_per_club: int,
+        warm_start: Optional[Sequence[Any]] = None,
+    ) -> LineUp:
+        """Draft players following an specified scheme, warm starting every island."""
+        best = self._evolve(price, scheme, max_players_per_club, warm_start, 1)[0]
+        best.bench = self._draft_bench(best)
+        return best
+
+    def draft_many(
+        self,
+        price: float,
+        scheme: Scheme,
+        max_players_per_club: int,
+        n_line_ups: int,
+        min_distance: int = 1,
+        warm_start: Optional[Sequence[Any]] = None,
+    ) -> List[LineUp]:
+        """Draft the best distinct line ups from the last generation of all islands.
+
+        Only line ups within the price and max players per club are returned, so there
+        may be fewer than asked.
+        """
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        line_ups = self._evolve(
+            price, scheme, max_players_per_club, warm_start, self.n_individuals
+        )
+        return self._distinct(
+            line_ups, price, max_players_per_club, n_line_ups, min_distance
+        )
@@ -0,0 +1,328 @@
+"""Genetic algorithm with a vectorized population."""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import math
+import time
+
+import numpy as np
+
+from . import BaseAlgorithm, DraftError
+from .. import Player, Scheme, LineUp
+
+
+class VectorizedGenetic(BaseAlgorithm):
+    """Genetic algorithm that keeps the population as a matrix of player indices.
+
+    Each row is an individual and each column is a line-up slot. Slots are grouped
+    by position, so the same column always holds players from the same position.
+    Random choices come from the `rng` attribute, a numpy generator of its own, and
+    are drawn for the whole population at once.
+
+    Statistics given to the callbacks are the same as the ones of `Genetic`, except
+    for the fitness cache and the repair, which this algorithm does not have.
+    """
+
+    # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    # The parameters mirror the genetic algorithm ones, so they are set alike.
+    # pylint: disable=duplicate-code
+
+    def __init__(
+        self,
+        players: List[Player],
+        n_generations: int = 200,
+        n_individuals: int = 500,
+        n_elite: int = 10,
+        crossover_proba: float = 0.5,
+        mutation_proba: float = 0.5,
+        max_n_mutations: int = 3,
+        time_limit: Optional[float] = None,
+        patience: Optional[int] = None,
+        seed: Optional[int] = None,
+    ):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        super().__init__(players, time_limit=time_limit, seed=seed)
+        self.rng = np.random.default_rng(seed)
+        self._seconds: Dict[str, float] = {}
+        self.n_generations = n_generations
+        self.n_individuals = n_individuals
+        self.n_elite = n_elite
+        self.crossover_proba = crossover_proba
+        self.mutation_proba = mutation_proba
+        self.n_mutations = max_n_mutations
+        self.patience = patience
+        self.history: List[float] = []
+
+        clubs = {club: i for i, club in enumerate({p.club for p in self.players})}
+        self._price = np.array([p.price for p in self.players], dtype=float)
+        self._points = np.array([p.points for p in self.players], dtype=float)
+        self._club = np.array([clubs[p.club] for p in self.players], dtype=np.intp)
+        self._n_clubs = len(clubs)
+        self._index_per_position = {
+            pos: np.array(
+                [i for i, p in enumerate(self.players) if p.position == pos],
+                dtype=np.intp,
+            )
+            for pos in self.players_per_position
+        }
+
+    def _slots(self, scheme: Scheme) -> List[str]:
+        """Position of each line-up slot."""
+        slots = []
+        for pos, count in scheme.items():
+            if len(self._index_per_position[pos]) < count:
+                raise DraftError("There are not enough players to form a line-up.")
+            slots += [pos] * count
+        return slots
+
+    def _create(self, slots: List[str]) -> np.ndarray:
+        """Create a random population."""
+        population = np.empty((self.n_individuals, len(slots)), dtype=np.intp)
+        start = 0
+        for pos in dict.fromkeys(slots):
+            count = slots.count(pos)
+            available = self._index_per_position[pos]
+            order = np.argsort(
+                self.rng.random((self.n_individuals, len(available))), axis=1
+            )
+            population[:, start : start + count] = available[order[:, :count]]
+            start += count
+        return population
+
+    def _seed(
+        self, warm_start: Sequence[Any], scheme: Scheme, slots: List[str]
+    ) -> np.ndarray:
+        """Individual with the available players of a previous line up.
+
+        Slots that they do not fill get random players.
+        """
+        line_up = self._warm_start(warm_start, scheme)
+        index = {player.id: i for i, player in enumerate(self.players)}
+        individual = np.empty(len(slots), dtype=np.intp)
+        start = 0
+        for pos in dict.fromkeys(slots):
+            count = slots.count(pos)
+            seeded = np.array(
+                [index[p.id] for p in line_up.players if p.position == pos],
+                dtype=np.intp,
+            )
+            available = self._index_per_position[pos]
+            others = self.rng.permutation(available[~np.isin(available, seeded)])
+            individual[start : start + count] = np.concatenate([seeded, others])[:count]
+            start += count
+        return individual
+
+    def _fitness(
+        self,
+        population: np.ndarray,
+        max_price: float,
+        max_players_per_club: int,
+    ) -> np.ndarray:
+        """Calculate fitness metric for the whole population. The greater the better"""
+        price = self._price[population].sum(axis=1)
+        points = self._points[population].sum(axis=1)
+
+        # Count players per club with a single bincount by offsetting each row.
+        offset = np.arange(len(population))[:, np.newaxis] * self._n_clubs
+        counts = np.bincount(
+            (self._club[population] + offset).ravel(),
+            minlength=len(population) * self._n_clubs,
+        )
+        max_per_club = counts.reshape(len(population), self._n_clubs).max(axis=1)
+
+        return np.where(
+            price > max_price,
+            max_price - price,
+            np.where(
+                max_per_club > max_players_per_club,
+                max_players_per_club - max_per_club,
+                points,
+            ),
+        )
+
+    def _crossover(self, population1: np.ndarray, population2: np.ndarray):
+        """Crossover pairs of teams in place."""
+        # Swapping a slot is only allowed when neither player is in the other team.
+        same = population1[:, :, np.newaxis] == population2[:, np.newaxis, :]
+        swap = (
+            (self.rng.random(population1.shape) > 0.5)
+            & ~same.any(axis=2)
+            & ~same.any(axis=1)
+        )
+        population1[swap], population2[swap] = population2[swap], population1[swap]
+
+    def _mutate(self, population: np.ndarray, candidates: np.ndarray, sizes):
+        """Change a random player from each line up in place."""
+        rows = np.arange(len(population))
+        # Retry the individuals that drew a player they already have.
+        for _ in range(population.shape[1]):
+            if len(rows) == 0:
+                break
+            slots = self.rng.integers(population.shape[1], size=len(rows))
+            choice = (self.rng.random(len(rows)) * sizes[slots]).astype(np.intp)
+            new = candidates[slots, choice]
+            repeated = (population[rows] == new[:, np.newaxis]).any(axis=1)
+            population[rows[~repeated], slots[~repeated]] = new[~repeated]
+            rows = rows[repeated]
+
+    def _offsprings(
+        self, population: np.ndarray, candidates: np.ndarray, sizes: np.ndarray
+    ) -> np.ndarray:
+        """Create offsprings."""
+        # pylint: disable=too-many-locals
+        elite = population[: self.n_elite]
+        n_pairs = (self.n_individuals + 1) // 2
+
+        start = time.perf_counter()
+        parents1 = elite[self.rng.integers(len(elite), size=n_pairs)]
+        parents2 = elite[self.rng.integers(len(elite), size=n_pairs)]
+        created = time.perf_counter()
+
+        crossover = self.rng.random(n_pairs) > self.crossover_proba
+        children1, children2 = parents1[crossover], parents2[crossover]
+        self._crossover(children1, children2)
+        parents1[crossover], parents2[crossover] = children1, children2
+        crossed = time.perf_counter()
+
+        mutation = self.rng.random(n_pairs) > self.mutation_proba
+        for _ in range(self.n_mutations):
+            for parents in (parents1, parents2):
+                children = parents[mutation]
+                self._mutate(children, candidates, sizes)
+                parents[mutation] = children
+
+        offsprings = np.empty((2 * n_pairs, population.shape[1]), dtype=np.intp)
+        offsprings[0::2], offsprings[1::2] = parents1, parents2
+        self._seconds = {
+            "create": created - start,
+            "crossover": crossed - created,
+            "mutate": time.perf_counter() - crossed,
+        }
+        return offsprings[: self.n_individuals]
+
+    def _report(self, generation: int, population: np.ndarray, fitness: np.ndarray):
+        """Call the callbacks with the statistics of a ranked generation."""
+        distinct = np.unique(np.sort(population, axis=1), axis=0)
+        stats = {
+            "generation": generation,
+            "points": float(self._points[population[0]].sum()),
+            "fitness": float(fitness[0]),
+            "feasible": float((fitness >= 0).mean()),
+            "diversity": len(distinct) / len(population),
+            "seconds": dict(self._seconds),
+        }
+        for callback in self.callbacks:
+            callback(stats)
+
+    def _to_line_up(self, individual: np.ndarray, scheme: Scheme) -> LineUp:
+        """Convert an individual into a line-up."""
+        players = [self.players[i] for i in individual]
+        return LineUp(scheme=scheme, players=players, bench=[])
+
+    def _evolve(
+        self,
+        price: float,
+        scheme: Scheme,
+        max_players_per_club: int,
+        warm_start: Optional[Sequence[Any]],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Evolve the generations, returning the last one ranked and its fitness.
+
+        With a warm start, half of the first population is the previous line up and
+        its neighbors, changed by a few mutations each.
+        """
+        # pylint: disable=too-many-locals
+        deadline = self._deadline()
+        slots = self._slots(scheme)
+        self.history = []
+
+        # Candidates for each slot padded to the largest position.
+        sizes = np.array([len(self._index_per_position[pos]) for pos in slots])
+        candidates = np.zeros((len(slots), np.max(sizes, initial=1)), dtype=np.intp)
+        for i, pos in enumerate(slots):
+            candidates[i, : sizes[i]] = self._index_per_position[pos]
+
+        start = time.perf_counter()
+        population = self._create(slots)
+        if warm_start:
+            neighbors = population[: max(self.n_individuals // 2, 1)]
+            neighbors[:] = self._seed(warm_start, scheme, slots)
+            for _ in range(self.n_mutations):
+                self._mutate(neighbors[1:], candidates, sizes)
+        self._seconds = {
+            "create": time.perf_counter() - start,
+            "crossover": 0.0,
+            "mutate": 0.0,
+        }
+
+        best_fitness = -math.inf
+        n_stalled = 0
+
+        for gen in range(self.n_generations):
+
+            start = time.perf_counter()
+            fitness = self._fitness(population, price, max_players_per_club)
+            order = np.argsort(-fitness, kind="stable")
+            population = population[order]
+            self._seconds["rank"] = time.perf_counter() - start
+
+            self.history.append(float(self._points[population[0]].sum()))
+            if self.callbacks:
+                self._report(gen, population, fitness[order])
+
+            best = population[0].copy()
+            n_stalled = n_stalled + 1 if fitness[order[0]] <= best_fitness else 0
+            best_fitness = max(fitness[order[0]], best_fitness)
+
+            if (
+                gen == self.n_generations - 1
+                or n_stalled == self.patience
+                or time.perf_counter() >= deadline
+            ):
+                return population, fitness[order]
+
+            population = self._offsprings(population, candidates, sizes)
+            population[0] = best
+
+        raise DraftError("Reached end of iterations without exiting.")
+
+    def draft(
+        self,
+        price: float,
+        scheme: Scheme,
+        max_players_per_club: int,
+        warm_start: Optional[Sequence[Any]] = None,
+    ) -> LineUp:
+        """Draft players following an specified scheme."""
+        population, _ = self._evolve(price, scheme, max_players_per_club, warm_start)
+        line_up = self._to_line_up(population[0], scheme)
+        line_up.bench = self._draft_bench(line_up)
+        return line_up
+
+    def draft_many(
+        self,
+        price: float,
+        scheme: Scheme,
+        max_players_per_club: int,
+        n_line_ups: int,
+        min_distance: int = 1,
+        warm_start: Optional[Sequence[Any]] = None,
+    ) -> List[LineUp]:
+        """Draft the best distinct line ups from the last generation of a single run.
+
+        Only line ups within the price and max players per club are returned, so there
+        may be fewer than asked.
+        """
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        population, fitness = self._evolve(
+            price, scheme, max_players_per_club, warm_start
+        )
+        return self._distinct(
+            (
+                self._to_line_up(individual, scheme)
+                for individual in population[fitness >= 0]
+            ),
+            price,
+            max_players_per_club,
+            n_line_ups,
+            min_distance,
+        )
@@ -0,0 +1,75 @@
+"""Cache of pools of players across warm invocations."""
+
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Dict
+
+import utils.payload
+
+from .drafter import Drafter
+from .records import Records, to_players
+
+
+def pool_hash(records: Records) -> str:
+    """Hash of the fields of the players that drafting depends on, in their order."""
+    columns = [records.columns[field] for field in utils.payload.FIELDS]
+    return hashlib.sha256(json.dumps(columns).encode()).hexdigest()
+
+
+class PoolCache:
+    """Drafters of the most recently used pools, which live across warm invocations.
+
+    Pools are identified by their content. The least recently used pools are
+    evicted when the cache has more than `size` players, counting the pruned pools
+    and algorithms kept by their drafters, and larger pools are not cached at all.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._drafters: "OrderedDict[str, Drafter]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._drafters)
+
+    @property
+    def n_players(self) -> int:
+        """Number of players kept by the drafters of all cached pools."""
+        return sum(drafter.size for drafter in self._drafters.values())
+
+    def get(self, records: Records) -> Drafter:
+        """Drafter of the players of some records, created if not cached."""
+        key = pool_hash(records)
+        if key in self._drafters:
+            self.hits += 1
+            self._drafters.move_to_end(key)
+            drafter = self._drafters[key]
+        else:
+            self.misses += 1
+            drafter = Drafter(to_players(records))
+            if len(drafter.players) <= self.size:
+                self._drafters[key] = drafter
+
+        # Drafters grow as they draft, so pools are evicted on every use.
+        while self.n_players > self.size:
+            self._drafters.popitem(last=False)
+            self.evictions += 1
+        return drafter
+
+    def clear(self):
+        """Evict all pools."""
+        self.evictions += len(self._drafters)
+        self._drafters.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hits, misses and evictions so far, and the size of the cache."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "pools": len(self),
+            "players": self.n_players,
+        }
@@ -0,0 +1,151 @@
+"""Drafts of line ups from the same players."""
+
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from . import LineUp, Player, Scheme
+from .algorithm import (
+    BaseAlgorithm,
+    create_algorithm,
+    prune_dominated,
+    select_algorithm,
+)
+from .telemetry import Telemetry
+
+# Most algorithms kept for each pool of players, the least recently used are dropped.
+MAX_ALGORITHMS = 8
+
+
+class Drafter:
+    """Draft line ups from the same players, reusing the algorithms.
+
+    Pruned pools and up to `MAX_ALGORITHMS` algorithms, with their indexes, are kept
+    for the next drafts. Algorithms of seeded drafts are not kept, so that they start
+    from their seed.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, players: List[Player], limit: Optional[float] = None):
+        self.players = players
+        self.time_limit = limit
+        self._pools: Dict[Tuple[Any, ...], List[Player]] = {}
+        self._algorithms: "OrderedDict[Tuple[Any, ...], BaseAlgorithm]" = OrderedDict()
+
+    @property
+    def size(self) -> int:
+        """Number of players kept, counting the pruned pools and the algorithms."""
+        return (
+            len(self.players)
+            + sum(len(pool) for pool in self._pools.values())
+            + sum(len(algo.players) for algo in self._algorithms.values())
+        )
+
+    def _pool(
+        self, scheme: Scheme, max_players_per_club: int, bench_size: int
+    ) -> List[Player]:
+        """Players that are not dominated for a scheme, club cap and bench size."""
+        key = (
+            *(count for _, count in scheme.items()),
+            max_players_per_club,
+            bench_size,
+        )
+        if key not in self._pools:
+            pool = prune_dominated(
+                self.players, scheme, max_players_per_club, n_reserves=bench_size
+            )
+            logging.info(
+                "Pruned %d of %d players (%.0f%%).",
+                len(self.players) - len(pool),
+                len(self.players),
+                100 * (1 - len(pool) / max(len(self.players), 1)),
+            )
+            self._pools[key] = pool
+        return self._pools[key]
+
+    def __call__(
+        self, request: Dict[str, Any]
+    ) -> Tuple[Union[LineUp, List[LineUp]], Optional[Dict[str, Any]]]:
+        """Draft a line up, or `n_line_ups` distinct ones, as asked in a request.
+
+        A `sample` of indexes of players restricts the draft to them. Returns the
+        telemetry summary as well, if asked.
+        """
+        # pylint: disable=too-many-locals,too-many-branches
+        scheme = Scheme(**request["scheme"])
+        price = float(request["price"])
+        max_players_per_club = int(request["max_players_per_club"])
+
+        bench_size = int(request.get("bench_size", 1))
+        prune = bool(request.get("prune", True))
+        sample = request.get("sample")
+        if sample is not None:
+            players = [self.players[i] for i in sample]
+            if prune:
+                players = prune_dominated(
+                    players, scheme, max_players_per_club, n_reserves=bench_size
+                )
+        elif prune:
+            players = self._pool(scheme, max_players_per_club, bench_size)
+        else:
+            players = self.players
+
+        params = dict(request.get("params", {}))
+        name = request.get("algorithm", "genetic")
+        if name == "auto":
+            name = select_algorithm(
+                len(players),
+                scheme,
+                price,
+                quality=request.get("quality", 0.99),
+                params=params,
+            )
+        elif name == "genetic" and request.get("backend", "python") == "numpy":
+            name = "vectorized"
+
+        if "seed" in request:
+            params.setdefault("seed", request["seed"])
+        limit = params.pop("time_limit", self.time_limit)
+        if params.get("seed") is None and sample is None:
+            # Pruned pools are kept, so their ids tell them apart.
+            key = (name, json.dumps(params, sort_keys=True), id(players))
+            if key not in self._algorithms:
+                self._algorithms[key] = create_algorithm(name, players, **params)
+                if len(self._algorithms) > MAX_ALGORITHMS:
+                    self._algorithms.popitem(last=False)
+            self._algorithms.move_to_end(key)
+            algo = self._algorithms[key]
+        else:
+            algo = create_algorithm(name, players, **params)
+        algo.time_limit = limit
+        algo.bench_size = bench_size
+
+        mode = request.get("telemetry")
+        telemetry = Telemetry(log=mode == "logs")
+        algo.callbacks = [telemetry] if mode else []
+
+        warm_start = request.get("warm_start")
+        if warm_start:
+            ids = {player.id for player in self.players}
+            logging.info(
+                "Warm starting from %d of %d players still available.",
+                sum(id_ in ids for id_ in warm_start),
+                len(warm_start),
+            )
+
+        if "n_line_ups" in request:
+            line_up = algo.draft_many(
+                price,
+                scheme,
+                max_players_per_club,
+                n_line_ups=int(request["n_line_ups"]),
+                min_distance=int(request.get("min_distance", 1)),
+                warm_start=warm_start,
+            )
+        else:
+            line_up = algo.draft(
+                price, scheme, max_players_per_club, warm_start=warm_start
+            )
+        return line_up, telemetry.summary() if mode == "summary" else None
@@ -0,0 +1,109 @@
+"""Monte Carlo dropout ensembles of drafts."""
+
+import math
+import random
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from . import LineUp, Player, parallel
+from .drafter import Drafter
+
+
+def dropout_masks(
+    players: List[Player],
+    n_samples: int,
+    dropout: float,
+    dropout_type: str = "all",
+    seed: Optional[int] = None,
+) -> List[List[int]]:
+    """Indexes of the players kept in each of some dropout samples.
+
+    As in the parse lambda, a share of all players, of the players of each position
+    or of the clubs is dropped out of each sample.
+    """
+    rng = random.Random(seed)
+    groups: Dict[Any, List[int]] = {}
+    for i, player in enumerate(players):
+        key = getattr(player, dropout_type) if dropout_type != "all" else None
+        groups.setdefault(key, []).append(i)
+
+    def n_to_keep(total: int) -> int:
+        return max(round(total * (1 - dropout)), 1)
+
+    masks = []
+    for _ in range(n_samples):
+        if dropout_type == "club":
+            clubs = rng.sample(list(groups), n_to_keep(len(groups)))
+            mask = [i for club in clubs for i in groups[club]]
+        else:
+            mask = [
+                i
+                for group in groups.values()
+                for i in rng.sample(group, n_to_keep(len(group)))
+            ]
+        masks.append(sorted(mask))
+    return masks
+
+
+def draft_ensemble(
+    drafter: Drafter, request: Dict[str, Any]
+) -> Tuple[Tuple[Union[LineUp, List[LineUp]], Optional[Dict[str, Any]]], List[Any]]:
+    """Draft from dropout samples of the players, and then a consensus line up.
+
+    Samples are drafted in worker processes. The consensus is drafted from all the
+    players, scoring the share of samples they were drafted in, with ties broken by
+    their points. Returns it as the drafter does, and the players drafted in any
+    sample with their shares, from the most drafted.
+    """
+    # pylint: disable=too-many-locals
+    options = request["ensemble"]
+    n_samples = int(options.get("n_samples", 10))
+    seed = request.get("seed")
+    masks = dropout_masks(
+        drafter.players,
+        n_samples,
+        float(options.get("dropout", 0.1)),
+        options.get("dropout_type", "all"),
+        seed=seed,
+    )
+    # The consensus is drafted after the samples, in the same time. The limit is
+    # passed on, since the drafter may be shared by later invocations.
+    n_workers = parallel.n_workers(n_samples, request.get("max_workers"))
+    limit = drafter.time_limit
+    if limit is not None:
+        limit /= math.ceil(n_samples / n_workers) + 1
+    params = {"time_limit": limit, **request.get("params", {})}
+
+    single = {k: v for k, v in request.items() if k not in ("n_line_ups", "telemetry")}
+    requests = [
+        {
+            **single,
+            "params": params,
+            "sample": mask,
+            "seed": None if seed is None else seed + i,
+        }
+        for i, mask in enumerate(masks)
+    ]
+    results = parallel.map_workers(drafter, requests, max_workers=n_workers)
+    counts = Counter(p.id for line_up, _ in results for p in line_up.players)
+
+    # Points of all the players add up to less than one more sample.
+    points = [player.points for player in drafter.players]
+    low, span = min(points), (max(points) - min(points)) or 1.0
+    scale = span * (n_samples + 1) * sum(request["scheme"].values())
+    players = [
+        Player(
+            id=p.id,
+            position=p.position,
+            price=p.price,
+            points=counts[p.id] / n_samples + (p.points - low) / scale,
+            club=p.club,
+        )
+        for p in drafter.players
+    ]
+    consensus = Drafter(players, limit)(request)
+    frequencies = [
+        {"id": id_, "frequency": count / n_samples}
+        for id_, count in counts.most_common()
+    ]
+    return consensus, frequencies
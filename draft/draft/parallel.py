@@ -0,0 +1,149 @@
+"""Process parallelism that works on AWS Lambda.
+
+Lambda has no shared memory device, so `multiprocessing.Pool` and `Queue` are not
+available there. Workers are plain processes that talk through pipes.
+
+`multiprocessing` is only imported when a worker is started, since it is slow to
+import and most drafts run in a single process.
+"""
+
+import os
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+
+
+def n_workers(n_tasks: int, max_workers: Optional[int] = None) -> int:
+    """Number of worker processes worth starting for some tasks."""
+    n_cpus = os.cpu_count() or 1
+    if max_workers is not None:
+        n_cpus = min(n_cpus, max_workers)
+    return max(min(n_cpus, n_tasks), 1)
+
+
+def _serve(conn: "Connection", factory: Callable[..., Any], args: Sequence[Any]):
+    """Create an object and call its methods as requested through the pipe."""
+    try:
+        obj = factory(*args)
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+            method, method_args = message
+            conn.send((True, getattr(obj, method)(*method_args)))
+    except Exception as error:  # pylint: disable=broad-except
+        conn.send((False, error))
+    finally:
+        conn.close()
+
+
+class Worker:
+    """Object living in another process.
+
+    Calls are split in `send` and `recv`, so that several workers can run at once.
+    Errors, including the ones on creating the object, are raised on `recv`. Workers
+    are not daemons, so that they can start workers themselves, and must be closed.
+    """
+
+    def __init__(self, factory: Callable[..., Any], *args: Any):
+        import multiprocessing  # pylint: disable=import-outside-toplevel
+
+        self._conn, child_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=_serve, args=(child_conn, factory, args)
+        )
+        self._process.start()
+        child_conn.close()
+
+    def send(self, method: str, *args: Any):
+        """Ask the worker to call a method."""
+        try:
+            self._conn.send((method, args))
+        except OSError:
+            # The worker stopped on an error, which is waiting to be received.
+            pass
+
+    def recv(self) -> Any:
+        """Get what the last called method returned, raising the worker errors."""
+        success, result = self._conn.recv()
+        if not success:
+            raise result
+        return result
+
+    def close(self):
+        """Stop the worker."""
+        if self._process.is_alive():
+            try:
+                self._conn.send(None)
+            except OSError:
+                self._process.terminate()
+            self._process.join()
+        self._conn.close()
+
+
+class Local:
+    """Object living in this process, with the same interface as `Worker`."""
+
+    def __init__(self, factory: Callable[..., Any], *args: Any):
+        self._obj = factory(*args)
+        self._message: Any = None
+
+    def send(self, method: str, *args: Any):
+        """Ask the object to call a method."""
+        self._message = (method, args)
+
+    def recv(self) -> Any:
+        """Call the last asked method."""
+        method, args = self._message
+        return getattr(self._obj, method)(*args)
+
+    def close(self):
+        """Nothing to stop."""
+
+
+def start(
+    factory: Callable[..., Any], args: Sequence[Sequence[Any]], parallel: bool
+) -> List[Any]:
+    """Start one worker per arguments, in other processes if parallel."""
+    cls = Worker if parallel else Local
+    workers: List[Any] = []
+    try:
+        for worker_args in args:
+            workers.append(cls(factory, *worker_args))
+    except Exception:
+        for worker in workers:
+            worker.close()
+        raise
+    return workers
+
+
+class _Map:  # pylint: disable=too-few-public-methods
+    """Apply a function to items."""
+
+    def __init__(self, func: Callable[[Any], Any]):
+        self.func = func
+
+    def run(self, items: Sequence[Any]) -> List[Any]:
+        """Apply the function to each item."""
+        return [self.func(item) for item in items]
+
+
+def map_workers(
+    func: Callable[[Any], Any],
+    items: Sequence[Any],
+    max_workers: Optional[int] = None,
+) -> List[Any]:
+    """Apply a function to items in worker processes, keeping the items order."""
+    count = n_workers(len(items), max_workers)
+    workers = start(_Map, [(func,)] * count, parallel=count > 1)
+    try:
+        for i, worker in enumerate(workers):
+            worker.send("run", items[i::count])
+        results: List[Any] = [None] * len(items)
+        for i, worker in enumerate(workers):
+            results[i::count] = worker.recv()
+        return results
+    finally:
+        for worker in workers:
+            worker.close()
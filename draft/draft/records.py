@@ -0,0 +1,54 @@
+"""Records of the players of an event."""
+
+from typing import Any, Dict, List, Optional, Union
+
+import utils.payload
+
+from . import Player
+
+
+class Records:
+    """Records of players by id, from a list of records or a columnar payload.
+
+    The fields that drafting reads are kept as columns, and the records of a
+    columnar payload are only built for the players that are looked up.
+    """
+
+    def __init__(self, players: Union[List[Dict[str, Any]], Dict[str, Any]]):
+        if utils.payload.is_encoded(players):
+            data = utils.payload.columns(players)
+            self.columns: Dict[str, List[Any]] = data["columns"]
+            self._extra: Dict[str, List[Any]] = data["extra"]
+            self._records: Optional[List[Dict[str, Any]]] = None
+        else:
+            self.columns = {
+                field: [r[field] for r in players] for field in utils.payload.FIELDS
+            }
+            self._extra = {}
+            self._records = players
+        self.index = {id_: i for i, id_ in enumerate(self.columns["id"])}
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def record(self, i: int) -> Dict[str, Any]:
+        """Record of the player in a row."""
+        if self._records is not None:
+            return self._records[i]
+        return {
+            **{field: column[i] for field, column in self.columns.items()},
+            **{field: column[i] for field, column in self._extra.items()},
+        }
+
+    def get(self, ids: List[int]) -> List[Dict[str, Any]]:
+        """Records of some players, in the order they were given."""
+        return [self.record(i) for i in sorted(self.index[id_] for id_ in ids)]
+
+
+def to_players(records: Records) -> List[Player]:
+    """Create players from the columns of their records."""
+    columns = [records.columns[field] for field in utils.payload.FIELDS]
+    return [
+        Player(id=id_, position=position, price=price, points=points, club=club)
+        for id_, position, price, points, club in zip(*columns)
+    ]
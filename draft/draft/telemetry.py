@@ -0,0 +1,43 @@
+"""Telemetry of the genetic algorithms."""
+
+import json
+import logging
+from typing import Any, Dict
+
+
+class Telemetry:
+    """Statistics of the generations of a draft.
+
+    Each generation is logged as JSON if `log`, and summed up by `summary`.
+    """
+
+    def __init__(self, log: bool = False):
+        self.log = log
+        self.n_generations = 0
+        self.seconds: Dict[str, float] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.last: Dict[str, Any] = {}
+
+    def __call__(self, stats: Dict[str, Any]):
+        """Record the statistics of a generation."""
+        if self.log:
+            logging.info(json.dumps({"telemetry": stats}))
+        self.n_generations += 1
+        for phase, seconds in stats["seconds"].items():
+            self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+        self.cache_hits += stats.get("cache_hits", 0)
+        self.cache_misses += stats.get("cache_misses", 0)
+        self.last = stats
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals of all generations and the statistics of the last one."""
+        return {
+            "n_generations": self.n_generations,
+            "seconds": self.seconds,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "points": self.last.get("points"),
+            "feasible": self.last.get("feasible"),
+            "diversity": self.last.get("diversity"),
+        }
@@ -0,0 +1,215 @@
+"""Drafting throughput and quality benchmark.
+
+Runs each algorithm over synthetic pools and several schemes, prices and max players
+per club. Players are pruned as in the handler, unless `--no-prune`, and pruning is
+timed along with the draft. The points reached are compared to the optimum found by
+the exact algorithm. Results are saved as JSON, which can be compared to the results
+of another commit:
+
+    python -m draft.tests.benchmark --output new.json --compare old.json
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from typing import Any, Dict, Iterator, List, Optional
+
+from draft.draft import Player, Scheme
+from draft.draft.algorithm import (
+    ALGORITHMS,
+    DraftError,
+    create_algorithm,
+    prune_dominated,
+)
+from . import helper, synthetic
+
+SIZES = [100, 500, 2000, 10000]
+SCHEMES = {
+    "4-3-3": Scheme(
+        goalkeeper=1, defender=2, fullback=2, midfielder=3, forward=3, coach=0
+    ),
+    "3-5-2": Scheme(
+        goalkeeper=1, defender=3, fullback=0, midfielder=5, forward=2, coach=1
+    ),
+}
+PRICES = [60, 100]
+MAX_PLAYERS_PER_CLUB = [2, 5]
+
+
+def synthetic_players(n_players: int) -> List[Player]:
+    """Synthetic players, with about 30 players per club as in Cartola FC."""
+    return helper.to_players(
+        synthetic.generate(n_players, n_clubs=max(n_players // 30, 20))
+    )
+
+
+def run(
+    algorithm: str,
+    players: List[Player],
+    case: Dict[str, Any],
+    memory: bool,
+    prune: bool = True,
+) -> Dict[str, Any]:
+    """Prune and draft once, returning the line up, seconds, generations and peak."""
+    args = (case["price"], SCHEMES[case["scheme"]], case["max_players_per_club"])
+
+    def draft():
+        pool = prune_dominated(players, *args[1:]) if prune else players
+        pruned = time.perf_counter()
+        algo = create_algorithm(algorithm, pool, seed=0)
+        return algo, algo.draft(*args), pruned
+
+    start = time.perf_counter()
+    algo, line_up, pruned = draft()
+    result = {
+        "line_up": line_up,
+        "seconds": time.perf_counter() - start,
+        "prune_seconds": pruned - start,
+        "n_generations": len(getattr(algo, "history", [])) or None,
+        "peak": None,
+    }
+    if memory:
+        # Traced apart, since tracing slows the draft down.
+        tracemalloc.start()
+        draft()
+        result["peak"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def cases(sizes: List[int]) -> Iterator[Dict[str, Any]]:
+    """Every combination of pool size, scheme, price and max players per club."""
+    product = itertools.product(sizes, SCHEMES, PRICES, MAX_PLAYERS_PER_CLUB)
+    for size, scheme, price, max_players_per_club in product:
+        yield {
+            "n_players": size,
+            "scheme": scheme,
+            "price": price,
+            "max_players_per_club": max_players_per_club,
+        }
+
+
+def summarize(outcome: Dict[str, Any], optimum: Optional[float]) -> Dict[str, Any]:
+    """Statistics of a draft, with its quality relative to the optimum points."""
+    draft_seconds = outcome["seconds"] - outcome["prune_seconds"]
+    points = outcome["line_up"].points
+    return {
+        "seconds": outcome["seconds"],
+        "prune_seconds": outcome["prune_seconds"],
+        "generations_per_second": (
+            outcome["n_generations"] / draft_seconds
+            if outcome["n_generations"]
+            else None
+        ),
+        "peak_kib": outcome["peak"] / 1024 if outcome["peak"] is not None else None,
+        "points": points,
+        "quality": points / optimum if optimum else None,
+    }
+
+
+def benchmark(
+    sizes: List[int], algorithms: List[str], memory: bool, prune: bool = True
+) -> List[Dict[str, Any]]:
+    """Run every algorithm on every case."""
+    results = []
+    for case in cases(sizes):
+        players = synthetic_players(case["n_players"])
+        case["n_pruned"] = len(
+            prune_dominated(
+                players, SCHEMES[case["scheme"]], case["max_players_per_club"]
+            )
+        )
+        case["prune"] = prune
+        try:
+            # Pruning keeps the optimum, and makes it much faster to find.
+            optimum = run("exact", players, case, memory=False)["line_up"].points
+        except DraftError:
+            optimum = None
+
+        for algorithm in algorithms:
+            result = {**case, "algorithm": algorithm}
+            try:
+                outcome = run(algorithm, players, case, memory, prune=prune)
+            except DraftError as error:
+                result["error"] = str(error)
+            else:
+                result.update(summarize(outcome, optimum))
+            results.append(result)
+            print(json.dumps(result))
+    return results
+
+
+def commit() -> Optional[str]:
+    """Current git commit, if any."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict[str, Any]], previous: List[Dict[str, Any]]):
+    """Print the change of time and quality from previous results."""
+    keys = ("algorithm", "n_players", "scheme", "price", "max_players_per_club")
+
+    def key(result):
+        # Results from before the prune option were all pruned.
+        return (*(result[k] for k in keys), result.get("prune", True))
+
+    before = {key(r): r for r in previous}
+    ratios = []
+    for result in results:
+        other = before.get(key(result))
+        if other is None or "seconds" not in result or "seconds" not in other:
+            continue
+        ratio = result["seconds"] / other["seconds"]
+        ratios.append(ratio)
+        print(
+            " ".join(str(result[k]) for k in keys),
+            f"time x{ratio:.2f}",
+            f"quality {other['quality']} -> {result['quality']}",
+        )
+    if ratios:
+        mean = math.exp(sum(math.log(r) for r in ratios) / len(ratios))
+        print(f"geometric mean time x{mean:.2f}")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", maxsplit=1)[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--algorithms", nargs="+", default=list(ALGORITHMS))
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc")
+    parser.add_argument("--no-prune", action="store_true", help="draft all players")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", help="results of a previous run")
+    options = parser.parse_args()
+
+    available = [a for a in options.algorithms if ALGORITHMS[a].is_available()]
+    output = {
+        "commit": commit(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "results": benchmark(
+            options.sizes,
+            available,
+            memory=not options.no_memory,
+            prune=not options.no_prune,
+        ),
+    }
+    with open(options.output, mode="w", encoding="utf-8") as file:
+        json.dump(output, file, indent=2)
+
+    if options.compare:
+        with open(options.compare, mode="r", encoding="utf-8") as file:
+            compare(output["results"], json.load(file)["results"])
@@ -2,9 +2,9 @@
 
 import json
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List
 
-from draft.draft import Player
+from draft.draft import Player, Scheme
 
 THIS_FOLDER = os.path.dirname(__file__)
 PLAYERS_JSON_PATH = os.path.join(THIS_FOLDER, "sample.json")
@@ -18,8 +18,8 @@ def load_players_dict() -> List[Dict[str, Any]]:
         return json.load(file)
 
 
-def load_players() -> List[Player]:
-    """Create line-up players."""
+def to_players(records: Iterable[Dict[str, Any]]) -> List[Player]:
+    """Create line-up players from their records."""
     return [
         Player(
             id=player["id"],
@@ -28,10 +28,27 @@ def load_players() -> List[Player]:
             points=player["points"],
             price=player["price"],
         )
-        for player in load_players_dict()
+        for player in records
     ]
 
 
+def create_scheme() -> Scheme:
+    """Create a typical scheme."""
+    return Scheme(
+        goalkeeper=1,
+        defender=2,
+        fullback=2,
+        midfielder=3,
+        forward=3,
+        coach=0,
+    )
+
+
+def load_players() -> List[Player]:
+    """Create line-up players."""
+    return to_players(load_players_dict())
+
+
 def load_players_by_position() -> Dict[str, List[Player]]:
     """Create line-up players."""
     # Load players.
@@ -0,0 +1,55 @@
+"""Cold start import time benchmark.
+
+Each run imports the draft lambda in a new interpreter, as on a Lambda cold start,
+and checks that optional heavy modules were not imported along.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict
+
+# Median seconds to import the lambda, including the standard library modules.
+BUDGET = 0.1
+# Modules that are only imported by the algorithms that use them.
+LAZY = ("numpy", "multiprocessing")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CODE = f"""
+import json, sys, time
+start = time.perf_counter()
+import draft
+seconds = time.perf_counter() - start
+modules = [module for module in {LAZY} if module in sys.modules]
+print(json.dumps({{"seconds": seconds, "modules": modules}}))
+"""
+
+
+def measure(n_runs: int = 5) -> Dict[str, Any]:
+    """Median import time of several cold starts, and the lazy modules imported."""
+    runs = [
+        json.loads(
+            subprocess.run(
+                [sys.executable, "-c", CODE],
+                capture_output=True,
+                check=True,
+                cwd=ROOT,
+                text=True,
+            ).stdout
+        )
+        for _ in range(n_runs)
+    ]
+    return {
+        "seconds": statistics.median(run["seconds"] for run in runs),
+        "modules": sorted({module for run in runs for module in run["modules"]}),
+    }
+
+
+if __name__ == "__main__":
+
+    result = measure(n_runs=10)
+    print(json.dumps({**result, "budget": BUDGET}))
+    if result["seconds"] > BUDGET or result["modules"]:
+        sys.exit(1)
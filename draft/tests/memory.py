@@ -0,0 +1,45 @@
+"""Memory and allocation benchmark"""
+
+import time
+import tracemalloc
+
+from draft.draft import LineUp
+from draft.draft.algorithm.genetic import Genetic
+from . import helper
+
+SCHEME = helper.create_scheme()
+N_COPIES = 10000
+
+
+def measure(func):
+    """Measure peak memory (KiB), number of allocated blocks and time of a call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+    return result, {"peak_kib": peak / 1024, "blocks": blocks, "seconds": elapsed}
+
+
+def copy_line_ups(original):
+    """Copy a line-up many times, as done while creating offsprings."""
+    return [original.copy() for _ in range(N_COPIES)]
+
+
+if __name__ == "__main__":
+
+    records = helper.load_players_dict()
+    players, stats = measure(lambda: helper.to_players(records))
+    print(f"players: {stats}")
+
+    algo = Genetic(players, n_generations=20, n_individuals=470, seed=0)
+    line_up = algo._create(SCHEME)  # pylint: disable=protected-access
+    line_up = LineUp(scheme=SCHEME, players=line_up.players, bench=[])
+    _, stats = measure(lambda: copy_line_ups(line_up))
+    print(f"{N_COPIES} copies: {stats}")
+
+    _, stats = measure(lambda: algo.draft(140, SCHEME, 5))
+    print(f"genetic: {stats}")
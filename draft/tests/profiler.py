@@ -2,7 +2,6 @@
 
 import pprofile
 
-from draft.draft import Scheme
 from draft.draft.algorithm.genetic import Genetic
 from . import helper
 
@@ -14,14 +13,7 @@ if __name__ == "__main__":
     with prof():
         Genetic(helper.load_players()).draft(
             price=140,
-            scheme=Scheme(
-                goalkeeper=1,
-                defender=2,
-                fullback=2,
-                midfielder=3,
-                forward=3,
-                coach=0,
-            ),
+            scheme=helper.create_scheme(),
             max_players_per_club=5,
         )
 
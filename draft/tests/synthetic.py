@@ -0,0 +1,109 @@
+"""Synthetic players for scale testing.
+
+Records have the same fields as the ones from the parse lambda, so they can be given
+to the draft handler as they are. They are generated one at a time, and can be
+streamed to JSON without building the whole pool in memory:
+
+    python -m draft.tests.synthetic --n-players 100000 --output players.json
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO
+
+# Share of the players, mean price and price deviation of each position, close to
+# the sample.
+POSITIONS = {
+    "goalkeeper": (0.09, 7.5, 2.8),
+    "fullback": (0.17, 6.8, 2.3),
+    "defender": (0.17, 5.7, 3.2),
+    "midfielder": (0.26, 6.2, 3.0),
+    "forward": (0.22, 8.0, 4.4),
+    "coach": (0.09, 9.6, 2.1),
+}
+MIN_PRICE = 0.5
+POINTS_MEAN = 1.0
+POINTS_STD = 0.01
+TIMESTAMP = "2022-10-16T22:00:00Z"
+
+
+def generate(
+    n_players: int,
+    n_clubs: int = 20,
+    positions: Optional[Dict[str, float]] = None,
+    correlation: float = 0.5,
+    seed: Optional[int] = 0,
+) -> Iterator[Dict[str, Any]]:
+    """Generate player records.
+
+    Positions are drawn with the given shares, which default to the ones of the
+    sample, and clubs are drawn uniformly. Points are normal, with the given
+    correlation to the price of players of the same position.
+    """
+    # pylint: disable=too-many-locals
+    rng = random.Random(seed)
+    shares = positions or {pos: share for pos, (share, *_) in POSITIONS.items()}
+    names, weights = list(shares), list(shares.values())
+    noise = math.sqrt(1 - correlation**2)
+
+    for i in range(n_players):
+        position = rng.choices(names, weights)[0]
+        _, mean, std = POSITIONS[position]
+        z_price = rng.gauss(0, 1)
+        z_points = correlation * z_price + noise * rng.gauss(0, 1)
+        price = round(max(mean + std * z_price, MIN_PRICE), 2)
+        club = f"club-{rng.randrange(n_clubs):03d}"
+        yield {
+            "club": club,
+            "club_badge": f"https://example.com/{club}.png",
+            "id": i,
+            "materialized_at": TIMESTAMP,
+            "name": f"Player {i}",
+            "photo": f"https://example.com/{i}.png",
+            "points": POINTS_MEAN + POINTS_STD * z_points,
+            "position": position,
+            "price_cartola": price,
+            "price": price,
+            "timestamp": TIMESTAMP,
+        }
+
+
+def dump(records: Iterable[Dict[str, Any]], file: TextIO):
+    """Write records as a JSON list, one record at a time."""
+    file.write("[")
+    for i, record in enumerate(records):
+        file.write(",\n" if i else "\n")
+        file.write(json.dumps(record))
+    file.write("\n]\n")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", maxsplit=1)[0])
+    parser.add_argument("--n-players", type=int, default=10000)
+    parser.add_argument("--n-clubs", type=int, default=20)
+    parser.add_argument(
+        "--positions",
+        type=json.loads,
+        help='share of each position, as in {"midfielder": 0.5, "forward": 0.5}',
+    )
+    parser.add_argument("--correlation", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON file, instead of the standard output")
+    options = parser.parse_args()
+
+    pool = generate(
+        options.n_players,
+        n_clubs=options.n_clubs,
+        positions=options.positions,
+        correlation=options.correlation,
+        seed=options.seed,
+    )
+    if options.output:
+        with open(options.output, mode="w", encoding="utf-8") as output:
+            dump(pool, output)
+    else:
+        dump(pool, sys.stdout)
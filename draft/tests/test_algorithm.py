@@ -0,0 +1,225 @@
+"""Unit tests for drafting algorithms."""
+
+# pylint: disable=protected-access
+
+import os
+import time
+
+import pytest
+
+from draft.draft.algorithm import ALGORITHMS, DraftError, distance, prune_dominated
+from draft.draft.algorithm.exact import Exact
+from draft.draft.algorithm.genetic import Genetic
+from draft.draft.algorithm.island import Island
+from . import helper, synthetic
+
+
+@pytest.fixture(name="scheme")
+def fixture_scheme():
+    """typical scheme"""
+    return helper.create_scheme()
+
+
+@pytest.fixture(name="algorithm_cls")
+def fixture_algorithm_cls(request):
+    """registered algorithm class, skipped if its requirements are missing"""
+    spec = ALGORITHMS[request.param]
+    if not spec.is_available():
+        pytest.skip(f"{request.param} requires {', '.join(spec.requires)}")
+    return spec.load()
+
+
+@pytest.mark.parametrize("algorithm_cls", ["genetic", "vectorized"], indirect=True)
+def test_patience(scheme, algorithm_cls):
+    """Test if the genetic algorithms stop when the best line-up stalls."""
+    algo = algorithm_cls(
+        helper.load_players(), n_generations=10000, n_individuals=50, patience=5
+    )
+    line_up = algo.draft(140, scheme, 5)
+    assert len(algo.history) < 10000
+    assert algo.history[-6:] == [algo.history[-1]] * 6
+    assert line_up.is_valid()
+
+
+@pytest.mark.parametrize("n_cpus", [1, 2])
+def test_island(scheme, n_cpus, monkeypatch):
+    """Test if islands evolve in this process or in worker processes."""
+    monkeypatch.setattr(os, "cpu_count", lambda: n_cpus)
+    algo = Island(
+        helper.load_players(),
+        n_generations=50,
+        n_individuals=200,
+        migration_interval=10,
+    )
+    line_up = algo.draft(140, scheme, 5)
+    assert line_up.is_valid()
+    assert line_up.price <= 140
+    assert len(line_up.bench) == 5
+    assert len(algo.history) == 50
+
+
+def test_island_few_players(scheme, monkeypatch):
+    """Test if errors from worker processes are raised."""
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    algo = Island(helper.load_players()[:10], n_generations=10)
+    with pytest.raises(DraftError):
+        algo.draft(140, scheme, 5)
+
+
+def test_fitness_cache(scheme):
+    """Test if repeated line ups are not evaluated again."""
+    algo = Genetic(
+        helper.load_players(), n_generations=20, n_individuals=100, cache_size=4096
+    )
+    algo.draft(140, scheme, 5)
+    assert algo.cache_hits > 0
+    assert algo.cache_hits + algo.cache_misses == 20 * 100
+
+
+def test_fitness_cache_disabled(scheme):
+    """Test if the fitness cache is disabled by default."""
+    algo = Genetic(helper.load_players(), n_generations=20, n_individuals=100)
+    algo.draft(140, scheme, 5)
+    assert algo.cache_hits == algo.cache_misses == 0
+
+
+def test_repair(scheme):
+    """Test if repaired line ups are within price and max players per club."""
+    algo = Genetic(helper.load_players(), n_generations=1, n_individuals=100)
+    line_ups = [algo._create(scheme) for _ in range(100)]
+    for line_up in line_ups:
+        algo._repair(line_up, 50, 2)
+        assert line_up.is_valid()
+        assert line_up.price <= 50
+        assert line_up.max_players_per_club <= 2
+
+
+def test_repair_draft(scheme):
+    """Test if repairing reaches a line up within a tight budget in few generations."""
+    algo = Genetic(
+        helper.load_players(), n_generations=5, n_individuals=50, repair=True
+    )
+    line_up = algo.draft(50, scheme, 2)
+    assert line_up.price <= 50
+    assert line_up.max_players_per_club <= 2
+
+
+@pytest.mark.parametrize("max_players_per_club", [1, 2, 5])
+def test_prune_dominated(scheme, max_players_per_club):
+    """Test if pruning dominated players keeps the best line up and bench."""
+    players = helper.load_players()
+    pruned = prune_dominated(players, scheme, max_players_per_club)
+    assert len(pruned) < len(players)
+
+    expected = Exact(players).draft(60, scheme, max_players_per_club)
+    actual = Exact(pruned).draft(60, scheme, max_players_per_club)
+    assert actual.points == pytest.approx(expected.points)
+    assert sorted(p.points for p in actual.bench) == pytest.approx(
+        sorted(p.points for p in expected.bench)
+    )
+
+
+def test_prune_positions_out_of_scheme(scheme):
+    """Test if positions out of the scheme are pruned."""
+    pruned = prune_dominated(helper.load_players(), scheme, 5)
+    assert not [p for p in pruned if p.position == "coach"]
+
+
+def test_exact_time_limit(scheme):
+    """Test if the exact algorithm keeps to the time limit on a large pool."""
+    players = helper.to_players(synthetic.generate(20000, n_clubs=600))
+    start = time.perf_counter()
+    try:
+        line_up = Exact(players, time_limit=0.5).draft(140, scheme, 5)
+    except DraftError:
+        pass
+    else:
+        assert line_up.is_valid()
+    assert time.perf_counter() - start < 1.5
+
+
+def test_exact_many_line_ups(scheme):
+    """Test if the exact algorithm drafts the best line ups that differ enough."""
+    algo = Exact(helper.load_players())
+    line_ups = algo.draft_many(140, scheme, 5, n_line_ups=5, min_distance=2)
+    assert len(line_ups) == 5
+    assert line_ups[0].points == pytest.approx(algo.draft(140, scheme, 5).points)
+    for i, line_up in enumerate(line_ups):
+        assert line_up.is_valid() and line_up.price <= 140
+        assert all(distance(line_up, other) >= 2 for other in line_ups[:i])
+        assert i == 0 or line_up.points <= line_ups[i - 1].points
+
+
+@pytest.mark.parametrize(
+    "algorithm_cls", ["genetic", "vectorized", "island", "exact"], indirect=True
+)
+def test_warm_start(scheme, algorithm_cls):
+    """Test if drafting starts from the players of a previous line up."""
+    players = helper.load_players()
+    best = Exact(players).draft(140, scheme, 5)
+    if algorithm_cls is Exact:
+        algo = Exact(players)
+    else:
+        params = {"max_workers": 1} if algorithm_cls is Island else {}
+        algo = algorithm_cls(players, n_generations=1, n_individuals=10, **params)
+
+    line_up = algo.draft(140, scheme, 5, warm_start=[p.id for p in best])
+    assert line_up.ids == best.ids
+
+
+def test_warm_start_unavailable(scheme):
+    """Test if players that are no longer available are left out of a warm start."""
+    players = helper.load_players()
+    best = Exact(players).draft(140, scheme, 5)
+    ids = [p.id for p in best.players[1:]] + ["unknown"]
+
+    algo = Genetic(players, n_individuals=10)
+    seed, *others = algo._population(scheme, warm_start=ids)
+    assert seed.is_valid()
+    assert set(ids[:-1]) <= seed.ids
+    assert len(others) == 9
+
+
+@pytest.mark.parametrize(
+    "algorithm_cls", ["genetic", "vectorized", "island"], indirect=True
+)
+def test_seed(scheme, algorithm_cls, monkeypatch):
+    """Test if drafts with the same seed are the same."""
+    drafts = []
+    for n_cpus in (1, 2, 1):
+        # Island streams do not depend on how islands are spread over processes.
+        monkeypatch.setattr(os, "cpu_count", lambda n=n_cpus: n)
+        algo = algorithm_cls(
+            helper.load_players(), n_generations=20, n_individuals=20, seed=0
+        )
+        line_up = algo.draft(140, scheme, 5)
+        drafts.append((line_up.ids, algo.history))
+    assert drafts[0] == drafts[1] == drafts[2]
+
+    algo = algorithm_cls(
+        helper.load_players(), n_generations=20, n_individuals=20, seed=1
+    )
+    algo.draft(140, scheme, 5)
+    assert algo.history != drafts[0][1]
+
+
+@pytest.mark.parametrize(
+    "algorithm_cls", ["genetic", "vectorized", "island"], indirect=True
+)
+def test_callbacks(scheme, algorithm_cls):
+    """Test if the callbacks get the statistics of every generation."""
+    algo = algorithm_cls(
+        helper.load_players(), n_generations=10, n_individuals=20, seed=0
+    )
+    generations = []
+    algo.callbacks.append(generations.append)
+    algo.draft(140, scheme, 5)
+
+    assert [stats["generation"] for stats in generations] == list(range(10))
+    assert [stats["points"] for stats in generations] == algo.history
+    for stats in generations:
+        assert 0 <= stats["feasible"] <= 1
+        assert 0 < stats["diversity"] <= 1
+        assert {"create", "crossover", "mutate", "rank"} <= set(stats["seconds"])
+    if algorithm_cls is Genetic:
+        assert sum(s["cache_hits"] for s in generations) == algo.cache_hits
@@ -0,0 +1,65 @@
+"""Unit tests for line-up drafting models."""
+
+import pytest
+
+from draft.draft import LineUp, Scheme
+from . import helper
+
+
+@pytest.fixture(name="line_up")
+def fixture_line_up():
+    """Line-up with a player from each position."""
+    players = helper.load_players_by_position()
+    scheme = Scheme(
+        goalkeeper=1,
+        defender=1,
+        fullback=1,
+        midfielder=1,
+        forward=1,
+        coach=1,
+    )
+    return LineUp(
+        scheme=scheme,
+        players=[players[pos][0] for pos in helper.POSITIONS],
+        bench=[],
+    )
+
+
+def test_running_totals(line_up):
+    """Test if totals follow players being added and removed."""
+    players = helper.load_players_by_position()
+    old = line_up.players_per_position["forward"][0]
+    new = [p for p in players["forward"] if p != old][0]
+
+    line_up.remove_player(old)
+    assert line_up.missing["forward"] == 1
+    assert not line_up.is_valid()
+    assert old not in line_up
+
+    line_up.add_player(new)
+    assert line_up.is_valid()
+    assert new in line_up
+    assert line_up.points == pytest.approx(sum(p.points for p in line_up.players))
+    assert line_up.price == pytest.approx(sum(p.price for p in line_up.players))
+
+
+def test_players_per_club(line_up):
+    """Test if players per club count matches the players."""
+    clubs = [p.club for p in line_up.players]
+    assert line_up.players_per_club == {c: clubs.count(c) for c in set(clubs)}
+    assert line_up.max_players_per_club == max(clubs.count(c) for c in clubs)
+
+
+def test_copy_is_independent(line_up):
+    """Test if changing a copy does not change the original line-up."""
+    players = helper.load_players_by_position()
+    copy = line_up.copy()
+    old = copy.players_per_position["defender"][0]
+    new = [p for p in players["defender"] if p != old][0]
+    copy.remove_player(old)
+    copy.add_player(new)
+
+    assert old in line_up and new not in line_up
+    assert new in copy and old not in copy
+    assert copy.players == sorted(copy.players, key=lambda p: p.position)
+    assert line_up.points != copy.points
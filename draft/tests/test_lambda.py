@@ -1,20 +1,26 @@
 """Unit tests for AWS lambda function."""
 
+import json
+import os
 import time
 
 import pytest
 
 import draft
-from draft.draft.algorithm import DraftError
-from . import helper
+import utils.payload
+from draft.draft import Scheme
+from draft.draft.algorithm import DraftError, select_algorithm
+from draft.draft.drafter import MAX_ALGORITHMS
+from draft.draft.ensemble import dropout_masks
+from . import helper, importtime, synthetic
 
 
 @pytest.fixture(name="event")
-def fixture_event():
-    """typical event"""
-    return {
+def fixture_event(request):
+    """typical event, with the algorithm of the parameter if any"""
+    event = {
         "players": helper.load_players_dict(),
-        "algorithm": "genetic",
+        "algorithm": getattr(request, "param", "genetic"),
         "scheme": {
             "goalkeeper": 1,
             "defender": 2,
@@ -27,6 +33,11 @@ def fixture_event():
         "max_players_per_club": 5,
         "bench": True,
     }
+    if event["algorithm"] == "vectorized":
+        # The vectorized algorithm is asked for through the numpy backend.
+        pytest.importorskip("numpy")
+        event["algorithm"], event["backend"] = "genetic", "numpy"
+    return event
 
 
 def test_time(event):
@@ -37,6 +48,7 @@ def test_time(event):
     assert end - start < 10
 
 
+@pytest.mark.parametrize("event", ["genetic", "vectorized", "exact"], indirect=True)
 def test_amount_of_players(event):
     """Test if amount of players is correct."""
     results = draft.handler(event=event, context=None)
@@ -44,12 +56,14 @@ def test_amount_of_players(event):
     assert len(results["bench"]) == 5
 
 
+@pytest.mark.parametrize("event", ["genetic", "vectorized", "exact"], indirect=True)
 def test_expected_points(event):
     """Test if points lies under expected range."""
     results = draft.handler(event=event, context=None)
     assert sum(p["points"] for p in results["players"]) > 11.1
 
 
+@pytest.mark.parametrize("event", ["genetic", "vectorized", "exact"], indirect=True)
 def test_price(event):
     """Test resulting price."""
     event["price"] = 50
@@ -57,6 +71,7 @@ def test_price(event):
     assert round(sum(p["price"] for p in results["players"])) <= 50
 
 
+@pytest.mark.parametrize("event", ["genetic", "vectorized", "exact"], indirect=True)
 def test_few_players(event):
     """Test if it fails if using few players."""
     event["players"] = event["players"][:10]
@@ -84,6 +99,7 @@ def test_bench_with_few_players(event):
     assert len(results["bench"]) < 5
 
 
+@pytest.mark.parametrize("event", ["genetic", "vectorized", "exact"], indirect=True)
 def test_max_players_per_club(event):
     """Test if max players per club is respected."""
     event["max_players_per_club"] = 3
@@ -92,6 +108,7 @@ def test_max_players_per_club(event):
     assert max(clubs.count(c) for c in clubs) <= 3
 
 
+@pytest.mark.parametrize("event", ["genetic", "vectorized", "exact"], indirect=True)
 def test_schema(event):
     """Test if schema is respected"""
     event["scheme"] = {
@@ -149,3 +166,398 @@ def test_extra_properties(event):
     players = results["players"] + results["bench"]
     for player in players:
         assert player["foo"] == "bar"
+
+
+@pytest.mark.parametrize("event", ["exact"], indirect=True)
+def test_exact_is_optimal(event):
+    """Test if the exact algorithm is at least as good as the genetic algorithm."""
+    exact = draft.handler(event=event, context=None)
+    event["algorithm"] = "genetic"
+    genetic = draft.handler(event=event, context=None)
+    assert (
+        sum(p["points"] for p in exact["players"])
+        >= sum(p["points"] for p in genetic["players"]) - 1e-9
+    )
+
+
+@pytest.mark.parametrize("event", ["exact"], indirect=True)
+def test_exact_impossible_price(event):
+    """Test if it fails when no line-up fits the price with the exact algorithm."""
+    event["price"] = 1
+    with pytest.raises(DraftError):
+        draft.handler(event=event, context=None)
+
+
+def test_algorithm_params(event):
+    """Test if algorithm parameters are passed from the event."""
+    event["params"] = {"n_generations": 2, "n_individuals": 20}
+    start = time.time()
+    results = draft.handler(event=event, context=None)
+    assert time.time() - start < 1
+    assert len(results["players"]) == 11
+
+
+def test_auto_algorithm_params(event):
+    """Test if parameters of other algorithms are left out of the chosen one."""
+    event["algorithm"] = "auto"
+    event["params"] = {"n_generations": 1000}
+    results = draft.handler(event=event, context=None)
+    assert len(results["players"]) == 11
+
+    event["algorithm"] = "genetic"
+    event["drafts"] = [{}, {"algorithm": "exact"}]
+    results = draft.handler(event=event, context=None)["drafts"]
+    assert [len(result["players"]) for result in results] == [11, 11]
+
+
+def test_unknown_params(event):
+    """Test if it fails with parameters of no algorithm."""
+    event["params"] = {"foo": 1}
+    with pytest.raises(DraftError, match="foo"):
+        draft.handler(event=event, context=None)
+
+
+def test_island_algorithm(event):
+    """Test if the island model reaches the expected points."""
+    event["algorithm"] = "island"
+    results = draft.handler(event=event, context=None)
+    assert len(results["players"]) == 11
+    assert sum(p["points"] for p in results["players"]) > 11.1
+
+
+def test_unknown_algorithm(event):
+    """Test if it fails with an unknown algorithm."""
+    event["algorithm"] = "foo"
+    with pytest.raises(DraftError):
+        draft.handler(event=event, context=None)
+
+
+def test_unavailable_algorithm(event, monkeypatch):
+    """Test if it fails cleanly when the requirements of an algorithm are missing."""
+    spec = draft.draft.algorithm.AlgorithmSpec(
+        path=".genetic.Genetic", requires=("not_installed",)
+    )
+    monkeypatch.setitem(draft.draft.algorithm.ALGORITHMS, "foo", spec)
+    event["algorithm"] = "foo"
+    with pytest.raises(DraftError, match="not_installed"):
+        draft.handler(event=event, context=None)
+
+
+def test_auto_algorithm(event):
+    """Test if the automatic choice reaches the expected points."""
+    event["algorithm"] = "auto"
+    results = draft.handler(event=event, context=None)
+    assert sum(p["points"] for p in results["players"]) > 11.1
+
+
+def test_auto_algorithm_pool_size(event):
+    """Test if the automatic choice prefers cheap solvers for small pools."""
+    scheme = Scheme(**event["scheme"])
+    assert select_algorithm(200, scheme, 140) == "exact"
+    assert select_algorithm(200, scheme, 140, params={"n_generations": 1}) != "exact"
+    assert select_algorithm(10000, scheme, 140) != "exact"
+    with pytest.raises(DraftError):
+        select_algorithm(200, scheme, 140, quality=1.1)
+
+
+def test_auto_algorithm_island(event, monkeypatch):
+    """Test if the island model is not chosen automatically, even on many cores."""
+    monkeypatch.setattr(os, "cpu_count", lambda: 64)
+    monkeypatch.delitem(draft.draft.algorithm.ALGORITHMS, "vectorized")
+    scheme = Scheme(**event["scheme"])
+    for n_players in (200, 2000, 20000):
+        assert select_algorithm(n_players, scheme, 140) != "island"
+
+
+class Context:  # pylint: disable=too-few-public-methods
+    """Lambda context stub."""
+
+    def __init__(self, millis):
+        self.millis = millis
+
+    def get_remaining_time_in_millis(self):
+        """Remaining time of the invocation."""
+        return self.millis
+
+
+def test_time_limit(event):
+    """Test if drafting stops before the lambda times out."""
+    event["params"] = {"n_generations": 100000}
+    start = time.time()
+    results = draft.handler(event=event, context=Context(millis=2000))
+    assert time.time() - start < 2
+    assert len(results["players"]) == 11
+
+
+@pytest.mark.parametrize("n_cpus", [1, 2])
+def test_batch(event, n_cpus, monkeypatch):
+    """Test if several drafts are returned in the requested order."""
+    monkeypatch.setattr(os, "cpu_count", lambda: n_cpus)
+    event["algorithm"] = "exact"
+    event["drafts"] = [
+        {"price": 50},
+        {"price": 140, "max_players_per_club": 2},
+        {"scheme": {**event["scheme"], "coach": 1, "forward": 2}, "bench": False},
+    ]
+    results = draft.handler(event=event, context=None)["drafts"]
+
+    assert len(results) == 3
+    assert sum(p["price"] for p in results[0]["players"]) <= 50
+    clubs = [p["club"] for p in results[1]["players"]]
+    assert max(clubs.count(c) for c in clubs) <= 2
+    assert len([p for p in results[2]["players"] if p["position"] == "coach"]) == 1
+    assert len(results[2]["bench"]) == 0
+
+
+@pytest.mark.parametrize(
+    "algorithm", ["genetic", "vectorized", "island", "exact", "auto"]
+)
+def test_many_line_ups(event, algorithm):
+    """Test if several distinct line ups are drafted in a single run."""
+    if algorithm == "vectorized":
+        pytest.importorskip("numpy")
+    event["algorithm"] = algorithm
+    event["n_line_ups"] = 5
+    event["min_distance"] = 2
+    results = draft.handler(event=event, context=None)["line_ups"]
+    assert len(results) == 5
+
+    ids = [{p["id"] for p in result["players"]} for result in results]
+    for i, left in enumerate(ids):
+        for right in ids[i + 1 :]:
+            assert len(left - right) >= 2
+    for result in results:
+        assert len(result["players"]) == 11
+        assert sum(p["price"] for p in result["players"]) <= 140
+
+
+@pytest.mark.parametrize("bench_size", [0, 2])
+def test_bench_size(event, bench_size):
+    """Test if the bench has the asked number of players of each position."""
+    event["algorithm"] = "exact"
+    event["bench_size"] = bench_size
+    result = draft.handler(event=event, context=None)
+
+    ids = {p["id"] for p in result["players"]}
+    for pos in ("goalkeeper", "defender", "fullback", "midfielder", "forward"):
+        players = [p for p in result["players"] if p["position"] == pos]
+        bench = [p for p in result["bench"] if p["position"] == pos]
+        assert len(bench) <= bench_size
+        for player in bench:
+            assert player["id"] not in ids
+            assert player["price"] <= min(p["price"] for p in players)
+
+
+def test_warm_start(event):
+    """Test if a previous line up seeds the draft through the handler."""
+    event["algorithm"] = "exact"
+    previous = draft.handler(event=event, context=None)["players"]
+
+    event["algorithm"] = "genetic"
+    event["params"] = {"n_generations": 1, "n_individuals": 10}
+    event["warm_start"] = [p["id"] for p in previous]
+    result = draft.handler(event=event, context=None)
+    assert {p["id"] for p in result["players"]} == {p["id"] for p in previous}
+
+
+def test_seed(event):
+    """Test if drafts with the same seed are reproducible through the handler."""
+    event["seed"] = 0
+    event["params"] = {"n_generations": 20, "n_individuals": 20}
+    results = [draft.handler(event=event, context=None) for _ in range(2)]
+    assert results[0] == results[1]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_columnar_payload(event, compress):
+    """Test if players may be given as a columnar payload."""
+    for player in event["players"]:
+        player["foo"] = "bar"
+    event["algorithm"] = "exact"
+    expected = draft.handler(event=dict(event), context=None)
+
+    event["players"] = utils.payload.encode(event["players"], compress=compress)
+    assert draft.handler(event=event, context=None) == expected
+
+
+def test_records(event):
+    """Test if records are looked up by id from records and columnar payloads."""
+    ids = [p["id"] for p in event["players"][::-1][:5]]
+    expected = [p for p in event["players"] if p["id"] in ids]
+    for players in (event["players"], utils.payload.encode(event["players"])):
+        records = draft.Records(players)
+        assert len(records) == len(event["players"])
+        assert records.get(ids) == expected
+
+
+def test_handler_seconds(event, caplog):
+    """Test if decoding, drafting and encoding times are logged apart."""
+    event["algorithm"] = "exact"
+    with caplog.at_level("INFO"):
+        draft.handler(event=event, context=None)
+    logs = [json.loads(m) for m in caplog.messages if m.startswith('{"seconds"')]
+    assert len(logs) == 1
+    assert set(logs[0]["seconds"]) == {"decode", "solve", "encode"}
+
+
+@pytest.mark.parametrize("dropout_type", ["all", "position", "club"])
+def test_dropout_masks(event, dropout_type):
+    """Test if dropout samples keep the share of the players of each group."""
+    players = helper.to_players(event["players"])
+    masks = dropout_masks(players, 3, 0.5, dropout_type, seed=0)
+    assert len(masks) == 3
+    assert masks == dropout_masks(players, 3, 0.5, dropout_type, seed=0)
+    for mask in masks:
+        assert mask == sorted(set(mask))
+        if dropout_type == "club":
+            n_clubs = len({players[i].club for i in mask})
+            assert n_clubs == round(len({p.club for p in players}) / 2)
+        else:
+            assert abs(len(mask) - len(players) / 2) <= 6
+
+
+def test_ensemble(event):
+    """Test if a consensus line up is drafted from dropout samples."""
+    event["algorithm"] = "exact"
+    event["ensemble"] = {"n_samples": 4, "dropout": 0.3}
+    event["seed"] = 0
+    result = draft.handler(event=event, context=None)
+    assert len(result["players"]) == 11
+    assert len(result["bench"]) == 5
+    assert round(sum(p["price"] for p in result["players"])) <= 140
+
+    frequencies = {f["id"]: f["frequency"] for f in result["frequencies"]}
+    assert sum(frequencies.values()) == pytest.approx(11)
+    assert all(0 < frequency <= 1 for frequency in frequencies.values())
+    # Players drafted in every sample are in the consensus.
+    ids = {p["id"] for p in result["players"]}
+    assert {id_ for id_, f in frequencies.items() if f == 1} <= ids
+    assert result == draft.handler(event=event, context=None)
+
+
+def test_ensemble_time_limit(event, monkeypatch):
+    """Test if a failed ensemble leaves the time limit of a cached pool as it was."""
+    pools = draft.PoolCache(size=draft.POOL_CACHE_SIZE)
+    monkeypatch.setattr(draft, "POOLS", pools)
+    event["algorithm"] = "exact"
+    event["ensemble"] = {"n_samples": 2}
+    event["price"] = 1
+    with pytest.raises(DraftError):
+        draft.handler(event=event, context=Context(millis=3000))
+    assert pools.get(draft.Records(event["players"])).time_limit == 2
+
+
+@pytest.mark.parametrize("algorithm", ["exact", "vectorized"])
+def test_large_pool(event, algorithm):
+    """Test drafting from a synthetic pool much larger than the sample."""
+    if algorithm == "vectorized":
+        pytest.importorskip("numpy")
+    event["players"] = list(synthetic.generate(20000, n_clubs=600))
+    event["algorithm"] = algorithm
+    event["price"] = 100
+    event["max_players_per_club"] = 2
+    result = draft.handler(event=event, context=None)
+
+    assert len(result["players"]) == 11
+    assert sum(p["price"] for p in result["players"]) <= 100
+    clubs = [p["club"] for p in result["players"]]
+    assert max(clubs.count(club) for club in clubs) <= 2
+
+
+def test_telemetry(event):
+    """Test if the handler sums up the generations of a draft."""
+    event["telemetry"] = "summary"
+    event["params"] = {"n_generations": 10, "n_individuals": 20, "cache_size": 100}
+    summary = draft.handler(event=event, context=None)["telemetry"]
+    assert summary["n_generations"] == 10
+    assert summary["cache_hits"] + summary["cache_misses"] == 10 * 20
+    phases = {"create", "crossover", "mutate", "repair", "rank"}
+    assert set(summary["seconds"]) == phases
+    assert 0 <= summary["feasible"] <= 1
+
+
+@pytest.mark.parametrize("n_cpus", [1, 2])
+def test_telemetry_island(event, n_cpus, monkeypatch):
+    """Test if the handler sums up the generations of all the islands."""
+    monkeypatch.setattr(os, "cpu_count", lambda: n_cpus)
+    event["algorithm"] = "island"
+    event["telemetry"] = "summary"
+    event["params"] = {"n_generations": 10, "n_individuals": 20, "cache_size": 100}
+    summary = draft.handler(event=event, context=None)["telemetry"]
+    assert summary["n_generations"] == 10
+    assert summary["cache_hits"] + summary["cache_misses"] == 10 * 20
+    assert 0 <= summary["feasible"] <= 1
+
+
+def test_telemetry_logs(event, caplog):
+    """Test if the statistics of each generation are logged."""
+    event["telemetry"] = "logs"
+    event["params"] = {"n_generations": 10, "n_individuals": 20}
+    with caplog.at_level("INFO"):
+        result = draft.handler(event=event, context=None)
+    assert "telemetry" not in result
+    assert sum('"telemetry"' in message for message in caplog.messages) == 10
+
+
+def test_import_time():
+    """Test if the lambda cold start imports are within the budget."""
+    result = importtime.measure(n_runs=3)
+    assert result["modules"] == []
+    assert result["seconds"] <= importtime.BUDGET
+
+
+def test_pool_cache(event, monkeypatch):
+    """Test if pools are reused across invocations, evicting the least recent."""
+    pools = draft.PoolCache(size=3 * len(event["players"]))
+    monkeypatch.setattr(draft, "POOLS", pools)
+    event["algorithm"] = "exact"
+    first = draft.handler(event=event, context=None)
+    second = draft.handler(event=event, context=None)
+    assert first == second
+    assert (pools.hits, pools.misses) == (1, 1)
+
+    # The same players with other points are another pool.
+    others = []
+    for i in range(3):
+        records = [{**p, "points": p["points"] + i + 1} for p in event["players"]]
+        others.append(records)
+        pools.get(draft.Records(records))
+    assert pools.misses == 4
+    assert pools.evictions == 1
+    assert len(pools) == 3 and pools.n_players == pools.size
+
+    # The least recently used pool was the first one.
+    pools.get(draft.Records(others[0]))
+    assert pools.hits == 2
+
+    records = [{**p, "id": i} for i, p in enumerate(event["players"] * 4)]
+    pools.get(draft.Records(records))
+    assert len(pools) == 3
+
+    pools.clear()
+    assert len(pools) == 0
+    assert pools.evictions == 4
+
+
+def test_pool_cache_algorithms(event, monkeypatch):
+    """Test if the algorithms kept for a pool are bounded and counted."""
+    pools = draft.PoolCache(size=draft.POOL_CACHE_SIZE)
+    monkeypatch.setattr(draft, "POOLS", pools)
+    event["algorithm"] = "exact"
+    for resolution in range(1, MAX_ALGORITHMS + 3):
+        event["params"] = {"resolution": resolution}
+        draft.handler(event=event, context=None)
+
+    drafter = pools.get(draft.Records(event["players"]))
+    # pylint: disable=protected-access
+    assert len(drafter._algorithms) == MAX_ALGORITHMS
+    assert pools.n_players == drafter.size > len(event["players"])
+
+
+def test_pool_cache_disabled(event, monkeypatch):
+    """Test if the pool cache can be bypassed."""
+    pools = draft.PoolCache(size=draft.POOL_CACHE_SIZE)
+    monkeypatch.setattr(draft, "POOLS", pools)
+    event["cache"] = False
+    draft.handler(event=event, context=None)
+    assert pools.stats()["misses"] == 0
@@ -1,38 +1,154 @@
 """Read data from Google Big Query."""
 
+import functools
 import json
+import logging
 import random
-from decimal import Decimal
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
-import pandas as pd
-from pandas import Timestamp
+import pyarrow as pa
+from google.cloud import bigquery
 
 import utils.google
+import utils.payload
 
 creds = utils.google.get_creds_from_env_vars()
 
-
-class Encoder(json.JSONEncoder):
-    """Encoder for JSON."""
-
-    def default(self, o):
-        """Encode Decimal."""
-        if isinstance(o, Decimal):
-            return float(o)
-        if isinstance(o, Timestamp):
-            return o.isoformat()
-        return json.JSONEncoder.default(self, o)
-
-
-def read_bigquery(query):
+# Seconds that query results are used without checking if the table changed.
+CACHE_TTL = 300
+# The players table is materialized once per round. Players have the time their
+# table was materialized, so the version query only runs to check cached players.
+VERSION_FIELD = "materialized_at"
+VERSION_QUERY = """
+    SELECT
+        MAX(materialized_at) AS version
+    FROM
+        palpiteiro.dim_player_last
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def get_client() -> bigquery.Client:
+    """BigQuery client, created once per container."""
+    return bigquery.Client(project=creds.project_id, credentials=creds)
+
+
+def _to_python(column: pa.Array) -> List[Any]:
+    """Convert an Arrow column into JSON serializable values."""
+    values = column.to_pylist()
+    if pa.types.is_decimal(column.type):
+        return [None if v is None else float(v) for v in values]
+    if (
+        pa.types.is_timestamp(column.type)
+        or pa.types.is_date(column.type)
+        or pa.types.is_time(column.type)
+    ):
+        return [None if v is None else v.isoformat() for v in values]
+    return values
+
+
+def records_from_arrow(batches: Iterable[pa.RecordBatch]) -> List[Dict[str, Any]]:
+    """Convert Arrow record batches into JSON serializable records.
+
+    Each batch is converted column by column, and only one batch is converted at a
+    time. Decimals become floats and dates and times become ISO strings.
+    """
+    records: List[Dict[str, Any]] = []
+    for batch in batches:
+        columns = [_to_python(column) for column in batch.columns]
+        names = batch.schema.names
+        records.extend(dict(zip(names, row)) for row in zip(*columns))
+    return records
+
+
+def read_bigquery(query, client: Optional[bigquery.Client] = None):
     """Read data from Bigquery"""
-    dic = pd.read_gbq(
-        query=query,
-        project_id=creds.project_id,
-        index_col=None,
-        credentials=creds,
-    ).to_dict(orient="records")
-    return json.loads(json.dumps(dic, cls=Encoder))
+    client = client or get_client()
+    rows = client.query(query).result()
+    return records_from_arrow(rows.to_arrow_iterable())
+
+
+class QueryCache:
+    """Query results kept across warm invocations, for some time.
+
+    Results older than the time to live are read again. With a version query, such
+    as the last time the table was materialized, they are only read again if the
+    version changed, and otherwise live for another time to live. The version of
+    the results read is the greatest value of their version field, which the version
+    query must match.
+    """
+
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Tuple[str, str], Tuple[float, Any, List[Dict]]] = {}
+
+    def get(
+        self,
+        key: str,
+        query: str,
+        version_query: Optional[str] = None,
+        client: Optional[bigquery.Client] = None,
+        version_field: str = VERSION_FIELD,
+    ) -> List[Dict[str, Any]]:
+        """Results of a query, read from BigQuery if not cached or outdated."""
+        now = self.clock()
+        entry = self._entries.get((key, query))
+        if entry is not None and now - entry[0] < self.ttl:
+            self.hits += 1
+            return list(entry[2])
+
+        if entry is not None and version_query is not None:
+            version = read_bigquery(version_query, client)[0]["version"]
+            if version is not None and version == entry[1]:
+                self.hits += 1
+                self._entries[key, query] = (now, version, entry[2])
+                return list(entry[2])
+
+        records = read_bigquery(query, client)
+        self.misses += 1
+        versions = [r.get(version_field) for r in records]
+        version = max((v for v in versions if v is not None), default=None)
+        self._entries[key, query] = (now, version, records)
+        return list(records)
+
+    def age(self, key: str, query: str) -> Optional[float]:
+        """Seconds since the results of a query were read or checked, if cached."""
+        entry = self._entries.get((key, query))
+        return None if entry is None else self.clock() - entry[0]
+
+    def clear(self):
+        """Forget all results."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hits, misses and hit rate so far."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else None,
+        }
+
+
+QUERIES = QueryCache(CACHE_TTL)
+
+
+def read_players(game: str, query: str, event: Dict[str, Any]) -> List[Dict]:
+    """Read the players of a game, through the query cache unless disabled."""
+    if not event.get("query_cache", True):
+        return read_bigquery(query)
+
+    version_query = VERSION_QUERY if event.get("check_version", True) else None
+    players = QUERIES.get(game, query, version_query)
+    logging.info(
+        "Query cache: %s",
+        json.dumps({**QUERIES.stats(), "age": QUERIES.age(game, query)}),
+    )
+    return players
 
 
 def _n_to_keep(total, dropout):
@@ -68,6 +184,9 @@ def dropout_clubs(players, dropout):
 
 def handler(event, context=None):  # pylint: disable=unused-argument
     """Lambda handler."""
+    if utils.payload.is_encoded(event.get("players")):
+        event["players"] = utils.payload.decode(event["players"])
+
     if "express" in event["game"]:
         query = """
             SELECT
@@ -78,7 +197,7 @@ def handler(event, context=None):  # pylint: disable=unused-argument
             WHERE
                 position != 'coach'
         """
-        event["players"] = read_bigquery(query)
+        event["players"] = read_players("cartola express", query, event)
 
     elif "cartola" in event["game"]:
         query = """
@@ -88,7 +207,7 @@ def handler(event, context=None):  # pylint: disable=unused-argument
             FROM
                 palpiteiro.dim_player_last
         """
-        event["players"] = read_bigquery(query)
+        event["players"] = read_players("cartola", query, event)
 
     if event["dropout"]:
         if "dropout_type" not in event or "all" in event["dropout_type"]:
@@ -98,4 +217,9 @@ def handler(event, context=None):  # pylint: disable=unused-argument
         if "club" in event["dropout_type"]:
             event["players"] = dropout_clubs(event["players"], event["dropout"])
 
+    if event.get("payload") == utils.payload.FORMAT:
+        event["players"] = utils.payload.encode(
+            event["players"], compress=bool(event.get("compress"))
+        )
+
     return event
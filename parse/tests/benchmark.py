@@ -0,0 +1,104 @@
+"""Ingestion benchmark.
+
+Compares the conversion of query results into records through pandas and a JSON
+round trip, as `pd.read_gbq` results were converted before, to the conversion of
+Arrow record batches. Results are a table like the one of `dim_player_last`, made
+from the sample players repeated up to each size.
+"""
+
+import datetime
+import json
+import os
+import time
+import tracemalloc
+from decimal import Decimal
+
+import pandas as pd
+import pyarrow as pa
+
+import parse
+
+THIS_DIR = os.path.dirname(__file__)
+SIZES = [1000, 10000, 100000]
+
+
+class Encoder(json.JSONEncoder):
+    """Encoder of the previous ingestion."""
+
+    def default(self, o):
+        """Encode Decimal and Timestamp."""
+        if isinstance(o, Decimal):
+            return float(o)
+        if isinstance(o, pd.Timestamp):
+            return o.isoformat()
+        return json.JSONEncoder.default(self, o)
+
+
+def create_table(size: int) -> pa.Table:
+    """Table of players with the types of BigQuery results."""
+    with open(os.path.join(THIS_DIR, "sample.json"), encoding="utf-8") as file:
+        sample = json.load(file)
+    players = [sample[i % len(sample)] for i in range(size)]
+
+    def timestamps(key):
+        values = [
+            datetime.datetime.fromisoformat(p[key].replace("Z", "+00:00"))
+            for p in players
+        ]
+        return pa.array(values, pa.timestamp("us", tz="UTC"))
+
+    return pa.table(
+        {
+            "id": pa.array(range(size), pa.int64()),
+            "name": [p["name"] for p in players],
+            "club": [p["club"] for p in players],
+            "position": [p["position"] for p in players],
+            "price": pa.array(
+                [Decimal(str(p["price"])) for p in players], pa.decimal128(38, 9)
+            ),
+            "points": pa.array([p["points"] for p in players], pa.float64()),
+            "materialized_at": timestamps("materialized_at"),
+            "timestamp": timestamps("timestamp"),
+        }
+    )
+
+
+def with_pandas(table: pa.Table):
+    """Previous ingestion: data frame, records and a JSON round trip."""
+    records = table.to_pandas().to_dict(orient="records")
+    return json.loads(json.dumps(records, cls=Encoder))
+
+
+def with_arrow(table: pa.Table):
+    """Ingestion of Arrow record batches."""
+    return parse.records_from_arrow(table.to_batches())
+
+
+def measure(func, table):
+    """Seconds and peak memory (MiB) of a call, measured apart."""
+    start = time.perf_counter()
+    func(table)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(table)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": seconds, "peak_mib": peak / 2**20}
+
+
+if __name__ == "__main__":
+
+    for n_rows in SIZES:
+        data = create_table(n_rows)
+        assert with_pandas(data) == with_arrow(data)
+        for ingestion in (with_pandas, with_arrow):
+            print(
+                json.dumps(
+                    {
+                        "n_rows": n_rows,
+                        "ingestion": ingestion.__name__,
+                        **measure(ingestion, data),
+                    }
+                )
+            )
@@ -1,12 +1,16 @@
 """Unit tests for the lambda function."""
 
+import datetime
 import json
 import os
+from decimal import Decimal
 
+import pyarrow as pa
 import pytest
 
 import parse
 import utils.google
+import utils.payload
 import utils.test
 
 THIS_DIR = os.path.dirname(__file__)
@@ -14,6 +18,47 @@ THIS_DIR = os.path.dirname(__file__)
 creds = utils.google.get_creds_from_env_vars()
 
 
+class FakeJob:
+    """Local stand-in for a BigQuery query job and its rows."""
+
+    def __init__(self, table: pa.Table):
+        self.table = table
+
+    def result(self):
+        """Wait for the query results."""
+        return self
+
+    def to_arrow_iterable(self):
+        """Iterate over the results as record batches."""
+        return iter(self.table.to_batches(max_chunksize=2))
+
+
+class FakeClient:  # pylint: disable=too-few-public-methods
+    """Local stand-in for the BigQuery client that returns an Arrow table.
+
+    The version query returns the version instead.
+    """
+
+    def __init__(self, table: pa.Table, version: str = "2022-10-15T21:28:25.882364Z"):
+        self.table = table
+        self.version = version
+        self.queries = []
+
+    def query(self, query):
+        """Run a query."""
+        self.queries.append(query)
+        if query == parse.VERSION_QUERY:
+            return FakeJob(pa.table({"version": [self.version]}))
+        return FakeJob(self.table)
+
+
+@pytest.fixture(name="client")
+def fixture_client(players):
+    """Client whose results are the sample players."""
+    table = pa.Table.from_pylist(players)
+    return FakeClient(table)
+
+
 @pytest.fixture(name="players")
 def fixture_players():
     """Generate synth players data."""
@@ -122,3 +167,107 @@ def test_other_args(players):
     }
     res = parse.handler(event=event, context=None)
     assert res["whatever"] == "else"
+
+
+def test_read_bigquery():
+    """Test if Arrow results are converted into serializable records."""
+    utc = datetime.timezone.utc
+    timestamp = datetime.datetime(2022, 10, 15, 21, 28, 25, tzinfo=utc)
+    table = pa.table(
+        {
+            "id": pa.array([1, 2, 3], pa.int64()),
+            "price": pa.array(
+                [Decimal("10.49"), None, Decimal("5")], pa.decimal128(38, 9)
+            ),
+            "points": pa.array([0.5, 1.0, None], pa.float64()),
+            "club": pa.array(["a", "b", "a"], pa.string()),
+            "materialized_at": pa.array(
+                [timestamp, timestamp, None], pa.timestamp("us", tz="UTC")
+            ),
+        }
+    )
+    client = FakeClient(table)
+
+    records = parse.read_bigquery("SELECT *", client=client)
+    assert client.queries == ["SELECT *"]
+    assert utils.test.is_serializable(records)
+    assert records == [
+        {
+            "id": 1,
+            "price": 10.49,
+            "points": 0.5,
+            "club": "a",
+            "materialized_at": "2022-10-15T21:28:25+00:00",
+        },
+        {
+            "id": 2,
+            "price": None,
+            "points": 1.0,
+            "club": "b",
+            "materialized_at": "2022-10-15T21:28:25+00:00",
+        },
+        {"id": 3, "price": 5.0, "points": None, "club": "a", "materialized_at": None},
+    ]
+
+
+def test_query_cache(client):
+    """Test if results are reused until they expire and the version changes."""
+    now = [0.0]
+    cache = parse.QueryCache(ttl=10, clock=lambda: now[0])
+
+    def get():
+        return cache.get("cartola", "SELECT *", parse.VERSION_QUERY, client=client)
+
+    # The version is taken from the results, with no version query.
+    first = get()
+    assert client.queries == ["SELECT *"]
+    assert cache.stats() == {"hits": 0, "misses": 1, "hit_rate": 0.0}
+
+    now[0] = 5
+    assert get() == first
+    assert len(client.queries) == 1
+    assert cache.age("cartola", "SELECT *") == 5
+
+    # Expired, but the table was not materialized again.
+    now[0] = 11
+    assert get() == first
+    assert client.queries[1:] == [parse.VERSION_QUERY]
+    assert cache.age("cartola", "SELECT *") == 0
+
+    # Expired and materialized again.
+    now[0] = 22
+    client.version = "2022-10-22T21:28:25Z"
+    get()
+    assert client.queries[2:] == [parse.VERSION_QUERY, "SELECT *"]
+    assert cache.stats() == {"hits": 2, "misses": 2, "hit_rate": 0.5}
+
+    cache.clear()
+    assert cache.age("cartola", "SELECT *") is None
+
+
+def test_handler_query_cache(client, monkeypatch):
+    """Test if the handler reads the players of a game once while cached."""
+    monkeypatch.setattr(parse, "get_client", lambda: client)
+    monkeypatch.setattr(parse, "QUERIES", parse.QueryCache(ttl=parse.CACHE_TTL))
+
+    first = parse.handler({"game": "cartola", "dropout": False})
+    second = parse.handler({"game": "cartola", "dropout": 0.5, "dropout_type": "all"})
+    assert len(first["players"]) == len(client.table)
+    assert len(second["players"]) == round(len(client.table) / 2)
+    assert parse.QUERIES.stats()["hits"] == 1
+
+    parse.handler({"game": "cartola", "dropout": False, "query_cache": False})
+    assert parse.QUERIES.stats()["misses"] == 1
+    assert len([q for q in client.queries if q != parse.VERSION_QUERY]) == 2
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_columnar_payload(players, compress):
+    """Test if players are returned and read as a columnar payload."""
+    payload = utils.payload.encode(players, compress=compress)
+    assert utils.payload.decode(json.loads(json.dumps(payload))) == players
+
+    event = {"game": "", "dropout": False, "players": payload}
+    event = parse.handler({**event, "payload": "columnar", "compress": compress})
+    assert utils.payload.decode(event["players"]) == players
+    assert len(json.dumps(event["players"])) < len(json.dumps(players))
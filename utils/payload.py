@@ -0,0 +1,58 @@
+"""Compact columnar payload of players, passed between the lambdas.
+
+Instead of a list of records, players are a column for each field. The fields that
+drafting reads are kept apart from the ones that are only passed through, and all
+columns may be compressed with zlib and encoded in base64:
+
+    {
+        "format": "columnar",
+        "columns": {"id": [...], "position": [...], ...},
+        "extra": {"name": [...], "photo": [...], ...},
+    }
+
+Compressed payloads have a "data" string with the JSON of the columns and the extra
+columns, instead of them.
+"""
+
+import base64
+import json
+import zlib
+from typing import Any, Dict, List
+
+FORMAT = "columnar"
+FIELDS = ("id", "position", "price", "points", "club")
+
+
+def is_encoded(players: Any) -> bool:
+    """Check if players are a columnar payload."""
+    return isinstance(players, dict) and players.get("format") == FORMAT
+
+
+def encode(records: List[Dict[str, Any]], compress: bool = False) -> Dict[str, Any]:
+    """Encode player records into a columnar payload.
+
+    Fields missing from some records are encoded as None.
+    """
+    extra = list(dict.fromkeys(k for r in records for k in r if k not in FIELDS))
+    payload: Dict[str, Any] = {
+        "columns": {field: [r[field] for r in records] for field in FIELDS},
+        "extra": {field: [r.get(field) for r in records] for field in extra},
+    }
+    if compress:
+        data = zlib.compress(json.dumps(payload, separators=(",", ":")).encode())
+        payload = {"data": base64.b64encode(data).decode("ascii")}
+    return {"format": FORMAT, **payload}
+
+
+def columns(payload: Dict[str, Any]) -> Dict[str, Dict[str, List[Any]]]:
+    """Columns and extra columns of a payload, decompressed if needed."""
+    if "data" in payload:
+        return json.loads(zlib.decompress(base64.b64decode(payload["data"])))
+    return {"columns": payload["columns"], "extra": payload["extra"]}
+
+
+def decode(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Decode a columnar payload into player records."""
+    data = columns(payload)
+    fields = {**data["columns"], **data["extra"]}
+    return [dict(zip(fields, values)) for values in zip(*fields.values())]